@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""Benchmarks for the stages of sip generation.
+
+Run it as:
+
+    python3 -m kbindinggenerator.benchmark [--sizes 25,50,100] [--methods 10]
+
+Synthetic KF5-like headers with a growing number of classes are put through
+the same stages ModuleGenerator.run() uses, and each stage is timed on its
+own. The time per class is printed for each size, so a stage which gets
+slower per class as the input grows shows up as a rising column. Use
+--headers to time real header files instead.
+
+Use --memory to measure the memory taken by the symbol data of a sip import,
+for example of PyQt's QtCore/QtCoremod.sip and the files it includes.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import os.path
+import subprocess
+import sys
+import time
+import tracemalloc
+import kbindinggenerator.pplexer as pplexer
+import kbindinggenerator.cppparser as cppparser
+import kbindinggenerator.cppsymboldata as cppsymboldata
+import kbindinggenerator.sipparser as sipparser
+import kbindinggenerator.sipsymboldata as sipsymboldata
+import kbindinggenerator.cpptosiptransformer as cpptosiptransformer
+import kbindinggenerator.sipmerger as sipmerger
+import kbindinggenerator.qtkde5macros as qtkde5macros
+import kbindinggenerator.profiling as profiling
+
+EXPORT_MACRO = "BENCH_EXPORT"
+
+# Stands in for the imported PyQt sip files.
+QT_SIP = """%Module PyQt5.QtCore
+class QObject
+{
+public:
+    QObject (QObject* parent = 0);
+};
+class QString;
+class QStringList;
+class QVariant;
+"""
+
+STAGES = ["preprocess", "cpp parse", "convert", "expand class names", "format",
+          "sip parse", "merge", "convert to sub class code"]
+
+def SyntheticHeader(classes,methods):
+    """Generate the text of a C++ header in the style of a KDE Frameworks header.
+
+    Keyword arguments:
+    classes -- number of classes, spread over a few nested namespaces.
+    methods -- number of ordinary methods per class.
+    """
+    lines = ["#ifndef BENCH_H", "#define BENCH_H", "",
+             "#include <QObject>", "",
+             "namespace Bench {",
+             "template<typename T> class Holder {",
+             "public:",
+             "    T value() const;",
+             "    void setValue(const T &value);",
+             "};"]
+    for i in range(classes):
+        namespace = "Detail%i" % (i % 3,)
+        base = "QObject" if i < 3 else "Bench::Detail%i::Class%i" % ((i-3) % 3,i-3)
+        lines.append("namespace %s {" % (namespace,))
+        lines.append("/**")
+        lines.append(" * Synthetic class number %i." % (i,))
+        lines.append(" *")
+        lines.append(" * @see Class%i" % (max(i-1,0),))
+        lines.append(" */")
+        lines.append("class BENCH_EXPORT Class%i : public %s {" % (i,base))
+        lines.append("    Q_OBJECT")
+        lines.append("    Q_PROPERTY(int count READ count WRITE setCount)")
+        lines.append("public:")
+        lines.append("    enum Mode%i { ModeA%i, ModeB%i = 0x2, ModeC%i = 0x4 };" % (i,i,i,i))
+        lines.append("    Q_DECLARE_FLAGS(Modes%i, Mode%i)" % (i,i))
+        lines.append("    explicit Class%i(QObject *parent = 0);" % (i,))
+        lines.append("    virtual ~Class%i();" % (i,))
+        lines.append("    int count() const;")
+        lines.append("    void setCount(int count);")
+        for j in range(methods):
+            kind = j % 4
+            lines.append("    /**")
+            lines.append("     * Method %i. @param name the name" % (j,))
+            lines.append("     * @return the result")
+            lines.append("     */")
+            if kind==0:
+                lines.append("    QList<Class%i*> items%i(const QString &name, int count = 0) const;" % (i,j))
+            elif kind==1:
+                lines.append("    void setMode%i(Mode%i mode, Modes%i modes = ModeA%i);" % (j,i,i,i))
+            elif kind==2:
+                lines.append("    QHash<QString,QVariant> data%i() const;" % (j,))
+            else:
+                lines.append("    virtual bool update%i(const QStringList &names, Holder<int> *holder = 0);" % (j,))
+        lines.append("public Q_SLOTS:")
+        lines.append("    void reset();")
+        lines.append("Q_SIGNALS:")
+        lines.append("    void countChanged(int count);")
+        lines.append("protected:")
+        lines.append("    virtual void changeEvent(int type);")
+        lines.append("private:")
+        lines.append("    class Private;")
+        lines.append("    Private *const d;")
+        lines.append("};")
+        lines.append("}")
+    lines.extend(["}", "", "#endif", ""])
+    return "\n".join(lines)
+
+def _NewCppParser():
+    parser = cppparser.CppParser()
+    parser.preprocessorSubstitutionMacros = qtkde5macros.QtPreprocessSubstitutionMacros()
+    parser.macros = qtkde5macros.QtMacros()
+    parser.bareMacros = qtkde5macros.QtBareMacros([EXPORT_MACRO])
+    return parser
+
+def _ParseQtSip(sipParser,sipSymbolData):
+    scope = sipParser.parse(sipSymbolData,QT_SIP)
+    scope.setModule("PyQt5.QtCore")
+    scope.setHeaderFilename("qobject.h")
+
+def TimeStages(texts):
+    """Run the sip generation stages over header texts and time each one.
+
+    Keyword arguments:
+    texts -- list of (filename,text) tuples.
+
+    Returns a dict mapping stage names to seconds.
+    """
+    timings = dict( (stage,0.0) for stage in STAGES )
+    def Timed(stage,func,*args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[stage] += time.perf_counter() - start
+        return result
+
+    cppParser = _NewCppParser()
+    substitutionMacros = cppparser.CompileMacros(qtkde5macros.QtPreprocessSubstitutionMacros())
+    preprocessedTexts = [(filename,Timed("preprocess",pplexer.preprocess,text,{},substitutionMacros))
+                         for filename,text in texts]
+
+    # Timed as one pass, like ModuleGenerator does it. Only the lexer and
+    # parser, the preprocessor has its own stage.
+    symbolData = cppsymboldata.SymbolData()
+    cppScopes = [Timed("cpp parse",cppParser.parsePreprocessed,symbolData,text,filename)
+                 for filename,text in preprocessedTexts]
+    for (filename,text),scope in zip(texts,cppScopes):
+        scope.setHeaderFilename(os.path.basename(filename))
+
+    transformer = cpptosiptransformer.CppToSipTransformer()
+    transformer.setExportMacros([EXPORT_MACRO])
+    sipParser = sipparser.SipParser()
+    sipSymbolData = sipsymboldata.SymbolData()
+    _ParseQtSip(sipParser,sipSymbolData)
+    sipScopes = [Timed("convert",transformer.convert,scope,sipSymbolData) for scope in cppScopes]
+    for scope in sipScopes:
+        Timed("expand class names",cpptosiptransformer.ExpandClassNames,sipSymbolData,scope)
+    sipTexts = [Timed("format",scope.format) for scope in sipScopes]
+
+    # The formatted sip files play the part of the previous sip files which a
+    # fresh conversion is merged into.
+    previousSymbolData = sipsymboldata.SymbolData()
+    _ParseQtSip(sipParser,previousSymbolData)
+    previousScopes = [Timed("sip parse",sipParser.parse,previousSymbolData,text,filename)
+                      for (filename,_),text in zip(texts,sipTexts)]
+    for (filename,text),scope in zip(texts,previousScopes):
+        scope.setHeaderFilename(os.path.basename(filename))
+    updateScopes = [transformer.convert(scope,previousSymbolData) for scope in cppScopes]
+    for previousScope,updateScope in zip(previousScopes,updateScopes):
+        Timed("merge",sipmerger.MergeSipScope,previousSymbolData,previousScope,updateScope)
+        previousSymbolData.removeScope(updateScope)
+    Timed("convert to sub class code",cpptosiptransformer.UpdateConvertToSubClassCodeDirectives,
+          previousSymbolData,previousScopes,[])
+    return timings
+
+def ImportSip(sipFilename):
+    """Parse a sip file and all the files it includes, like a sip import does.
+
+    Returns a (symbolData,scopes) tuple.
+    """
+    sipParser = sipparser.SipParser()
+    symbolData = sipsymboldata.SymbolData()
+    scopes = []
+    def Import(filename):
+        with open(filename) as fhandle:
+            scope = sipParser.parse(symbolData,fhandle.read(),filename=filename)
+        scopes.append(scope)
+        for item in scope:
+            if isinstance(item,symbolData.SipDirective) and item.body().startswith("%Include"):
+                includeFilename = os.path.join(os.path.dirname(filename),item.body()[len("%Include")+1:].strip())
+                if os.path.exists(includeFilename):
+                    Import(includeFilename)
+    Import(sipFilename)
+    return (symbolData,scopes)
+
+def CountObjects(scopes):
+    """Count the entities and function arguments held in the scopes.
+
+    Returns a (entities,arguments) tuple.
+    """
+    counts = [0,0]
+    def Count(scope):
+        for item in scope:
+            counts[0] += 1
+            if isinstance(item,cppsymboldata.SymbolData.Function):
+                counts[1] += len(item.arguments())
+            if isinstance(item,cppsymboldata.SymbolData.Entity) and \
+                    not isinstance(item,cppsymboldata.SymbolData.Enum):
+                Count(item)
+    for scope in scopes:
+        Count(scope)
+    return tuple(counts)
+
+def MeasureImport(sipFilename,traceHeap=False):
+    """Import a sip file and measure the memory it takes.
+
+    Returns a dict with the numbers of files, entities and arguments and the
+    peak RSS of the process in KiB before and after the import.
+
+    Keyword arguments:
+    traceHeap -- also trace the Python heap and return the bytes held by the
+        symbol data as "heap". This makes the import slower and adds to the
+        peak RSS.
+    """
+    sipparser.SipParser()   # Build the parser tables first.
+    rssBefore = profiling.PeakRSS()
+    if traceHeap:
+        tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            symbolData,scopes = ImportSip(sipFilename)
+        heap = tracemalloc.get_traced_memory()[0] if traceHeap else None
+    finally:
+        if traceHeap:
+            tracemalloc.stop()
+    entities,arguments = CountObjects(scopes)
+    return {"files": len(scopes), "entities": entities, "arguments": arguments,
+        "heap": heap, "rssBefore": rssBefore, "rss": profiling.PeakRSS()}
+
+def _Best(texts,repeat):
+    # The minimum of several runs is the least noisy figure.
+    best = None
+    for i in range(repeat):
+        # The stages print warnings, keep them off the terminal.
+        with contextlib.redirect_stdout(io.StringIO()):
+            timings = TimeStages(texts)
+        best = timings if best is None else dict( (stage,min(best[stage],timings[stage])) for stage in STAGES )
+    return best
+
+def _PrintTable(title,rows):
+    print(title)
+    print("%-28s" % ("stage",) + "".join("%14s" % (label,) for label,timings in rows))
+    for stage in STAGES:
+        print("%-28s" % (stage,) + "".join("%14.3f" % (timings[stage]*1000.0,) for label,timings in rows))
+    print("%-28s" % ("total",) + "".join("%14.3f" % (sum(timings.values())*1000.0,) for label,timings in rows))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default="25,50,100,200", help='comma separated numbers of classes per synthetic header')
+    parser.add_argument('--methods', default=10, type=int, help='methods per synthetic class')
+    parser.add_argument('--repeat', default=3, type=int, help='number of runs, the fastest is reported')
+    parser.add_argument('--headers', default=None, help='glob pattern of real header files to time instead of synthetic ones')
+    parser.add_argument('--compare-sealed', default=False, action='store_true', help='compare runs with the @sealed checks on and off')
+    parser.add_argument('--memory', default=None, metavar='SIPFILE', help='measure the memory used by importing a sip file')
+    parser.add_argument('--heap', default=False, action='store_true', help='with --memory, also trace the Python heap')
+    parser.add_argument('--json', default=False, action='store_true', help='print the synthetic header timings as JSON')
+    args = parser.parse_args(argv)
+
+    if args.memory is not None:
+        _PrintMemory(args)
+        return
+
+    if args.compare_sealed:
+        _CompareSealed(args)
+        return
+
+    # Build the parser tables before anything is timed.
+    _NewCppParser()
+    sipparser.SipParser()
+
+    if args.headers is not None:
+        texts = []
+        for filename in sorted(glob.glob(args.headers)):
+            with open(filename) as fhandle:
+                texts.append( (filename,fhandle.read()) )
+        print("%i header files" % (len(texts),))
+        _PrintTable("Milliseconds per stage:",[("total",_Best(texts,args.repeat))])
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    rows = []
+    for size in sizes:
+        text = SyntheticHeader(size,args.methods)
+        rows.append( ("%i classes" % (size,),_Best([("bench%i.h" % (size,),text)],args.repeat)) )
+    if args.json:
+        print(json.dumps({"sizes": sizes, "timings": [timings for label,timings in rows]}))
+        return
+    _PrintTable("Milliseconds per stage:",rows)
+    print("")
+    _PrintTable("Microseconds per class:",[(label,dict( (stage,timings[stage]*1000.0/size) for stage in STAGES ))
+                                            for size,(label,timings) in zip(sizes,rows)])
+    # Compare the per class cost of the largest run with the smallest one.
+    # Linear stages stay near 1.0x.
+    print("")
+    first,last = rows[0][1],rows[-1][1]
+    print("Per class growth from %i to %i classes:" % (sizes[0],sizes[-1]))
+    for stage in STAGES:
+        growth = (last[stage]/sizes[-1]) / max(first[stage]/sizes[0],1e-9)
+        print("    %-28s %6.2fx%s" % (stage,growth," <- superlinear?" if growth > 1.5 else ""))
+
+def _PrintMemory(args):
+    # Peak RSS covers the whole process, so each measurement runs in a fresh one.
+    modes = ("1","0") if args.compare_sealed else (os.environ.get("TWINE2_SEALED","1"),)
+    for mode in modes:
+        if args.json or not args.compare_sealed:
+            result = MeasureImport(args.memory,args.heap)
+        else:
+            env = dict(os.environ)
+            env["TWINE2_SEALED"] = mode
+            output = subprocess.check_output([sys.executable,"-m","kbindinggenerator.benchmark","--json",
+                "--memory",args.memory] + (["--heap"] if args.heap else []),env=env,cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            result = json.loads(output.decode("utf-8").strip().split("\n")[-1])
+        if args.json:
+            print(json.dumps(result))
+            continue
+        print("@sealed checks %s:" % ("on" if mode!="0" else "off",))
+        print("    %-28s %10i" % ("sip files",result["files"]))
+        print("    %-28s %10i" % ("entities",result["entities"]))
+        print("    %-28s %10i" % ("arguments",result["arguments"]))
+        if result["heap"] is not None:
+            print("    %-28s %10.1f MiB" % ("python heap",result["heap"]/1048576.0))
+            print("    %-28s %10i bytes" % ("heap per entity",result["heap"]//max(result["entities"],1)))
+        if result["rss"] is not None:
+            print("    %-28s %10.1f MiB (%.1f MiB before the import)" % ("peak RSS",result["rss"]/1024.0,result["rssBefore"]/1024.0))
+
+def _CompareSealed(args):
+    # @sealed is applied when the classes are defined, so each mode needs a
+    # process of its own.
+    results = {}
+    for mode in ("1","0"):
+        env = dict(os.environ)
+        env["TWINE2_SEALED"] = mode
+        output = subprocess.check_output([sys.executable,"-m","kbindinggenerator.benchmark","--json",
+            "--sizes",args.sizes,"--methods",str(args.methods),"--repeat",str(args.repeat)],
+            env=env,cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        results[mode] = json.loads(output.decode("utf-8").strip().split("\n")[-1])
+    print("Milliseconds with @sealed checks on / off:")
+    print("%-14s" % ("classes",) + "".join("%26s" % (stage,) for stage in ("cpp parse","sip parse","total")))
+    for i,size in enumerate(results["1"]["sizes"]):
+        on,off = results["1"]["timings"][i],results["0"]["timings"][i]
+        row = "%-14i" % (size,)
+        for onTime,offTime in ((on["cpp parse"],off["cpp parse"]),(on["sip parse"],off["sip parse"]),
+                               (sum(on.values()),sum(off.values()))):
+            row += "%26s" % ("%.1f / %.1f (%.2fx)" % (onTime*1000.0,offTime*1000.0,onTime/max(offTime,1e-9)),)
+        print(row)
+
+if __name__=="__main__":
+    main(sys.argv[1:])
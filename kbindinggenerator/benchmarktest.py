@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import unittest
+import contextlib
+import io
+import os.path
+import tempfile
+import benchmark
+import cppsymboldata
+
+class TestBenchmark(unittest.TestCase):
+
+    def testSyntheticHeader(self):
+        parser = benchmark._NewCppParser()
+        syms = cppsymboldata.SymbolData()
+        scope = parser.parse(syms,benchmark.SyntheticHeader(4,3))
+        for i in range(4):
+            cls = syms.lookupType("Bench::Detail%i::Class%i" % (i % 3,i),scope)
+            self.assertEqual(cls.name(),"Class%i" % (i,))
+
+    def testTimeStages(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            timings = benchmark.TimeStages([("bench.h",benchmark.SyntheticHeader(4,3))])
+        self.assertEqual(sorted(timings),sorted(benchmark.STAGES))
+        self.assertTrue(all(value>=0.0 for value in timings.values()))
+
+    def testMeasureImport(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory,"Benchmod.sip"),"w") as fhandle:
+                fhandle.write("%Module Bench\n\n%Include foo.sip\n")
+            with open(os.path.join(directory,"foo.sip"),"w") as fhandle:
+                fhandle.write("class Foo\n{\npublic:\n    Foo (int x, int y);\n    void bar (QString a) const;\n};\n")
+            result = benchmark.MeasureImport(os.path.join(directory,"Benchmod.sip"),traceHeap=True)
+        self.assertEqual(result["files"],2)
+        self.assertEqual(result["arguments"],3)
+        self.assertTrue(result["entities"]>=3)
+        self.assertTrue(result["heap"]>0)
+
+if __name__ == '__main__':
+    unittest.main()
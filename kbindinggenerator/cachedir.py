@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import os
+import os.path
+import sys
+import hashlib
+import tempfile
+
+def CacheDirectory(*subdirs):
+    """Get the directory used for twine2's on-disk caches.
+
+    The directory is $TWINE2_CACHE_DIR if set, otherwise twine2 under
+    $XDG_CACHE_HOME (or ~/.cache). It is created if needed.
+
+    Keyword arguments:
+    subdirs -- optional sub-directory names to append.
+    """
+    base = os.environ.get("TWINE2_CACHE_DIR")
+    if not base:
+        xdgCache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"),".cache")
+        base = os.path.join(xdgCache,"twine2")
+    path = os.path.join(base,*subdirs)
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    return path
+
+def WriteFileAtomic(filename,data,mode=None):
+    """Write a file by way of a temporary file and os.replace().
+
+    Readers never see a partially written file. data can be bytes or str,
+    str is written in text mode like open(filename,'w') does.
+
+    Keyword arguments:
+    mode -- permission bits for the new file. The default keeps the mode
+            of an existing file, or otherwise uses the umask.
+    """
+    if mode is None:
+        if os.path.exists(filename):
+            mode = os.stat(filename).st_mode & 0o7777
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+    fd,tmpFilename = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)),prefix=".tmp-")
+    try:
+        with os.fdopen(fd,'wb' if isinstance(data,bytes) else 'w') as fhandle:
+            fhandle.write(data)
+        os.chmod(tmpFilename,mode)
+        os.replace(tmpFilename,filename)
+    except:
+        os.unlink(tmpFilename)
+        raise
+
+def WriteFileIfChanged(filename,text):
+    """Write text to a file unless the file already holds exactly that text.
+
+    The file is replaced atomically. Returns True if the file was written.
+    """
+    if os.path.exists(filename):
+        try:
+            with open(filename) as fhandle:
+                if fhandle.read()==text:
+                    return False
+        except (IOError,UnicodeDecodeError):
+            pass
+    WriteFileAtomic(filename,text)
+    return True
+
+def SourceVersion(moduleFilenames):
+    """Get a hash of the given source files in this package.
+
+    Used to throw away cached data written by different code.
+    """
+    digest = hashlib.sha1()
+    digest.update(repr(sys.version_info[:2]).encode('ascii'))
+    packageDir = os.path.dirname(os.path.abspath(__file__))
+    for name in moduleFilenames:
+        with open(os.path.join(packageDir,name),'rb') as fhandle:
+            digest.update(fhandle.read())
+    return digest.hexdigest()
+
+def HashFile(filename):
+    """Get the SHA1 hex digest of a file's contents."""
+    with open(filename,'rb') as fhandle:
+        return hashlib.sha1(fhandle.read()).hexdigest()
@@ -21,6 +21,32 @@ import os.path
 import glob
 import kbindinggenerator.cmakeparser as cmakeparser
 
+_variableRegex = re.compile(r'(\$\{[^\}]+\})')
+
+_parser = None
+_commandCache = {}
+
+def ParseCMakeFile(filename):
+    """Parse a CMake file into a list of CMakeCommand objects.
+    
+    The result is cached and reused while the file's mtime and size stay the same.
+    """
+    stat = os.stat(filename)
+    stamp = (stat.st_mtime_ns,stat.st_size)
+    entry = _commandCache.get(filename)
+    if entry is not None and entry[0]==stamp:
+        return entry[1]
+    with open(filename) as fhandle:
+        command_list = _Parse(fhandle.read(), filename)
+    _commandCache[filename] = (stamp,command_list)
+    return command_list
+
+def _Parse(inputstring, filename=None):
+    global _parser
+    if _parser is None:
+        _parser = cmakeparser.CMakeParser()
+    return _parser.parse(inputstring, filename)
+
 def ExtractInstallFiles(filename=None,input=None,variables=None):
     if variables is None:
         variables = {}
@@ -38,17 +64,14 @@ def ExtractInstallFiles(filename=None,input=None,variables=None):
     return install_list
 
 def ExtractInstallFilesWithContext(variables, install_list, filename=None, input=None, fileprefix=""):
-    inputstring = ""
     currentdir = ""
     if input:
-        inputstring = input
+        command_list = _Parse(input, filename)
     elif filename:
         currentdir = os.path.dirname(filename)
-        fhandle = open(filename)
-        inputstring=  fhandle.read()
-        fhandle.close()
-    parser = cmakeparser.CMakeParser()
-    command_list = parser.parse(inputstring, filename)
+        command_list = ParseCMakeFile(filename)
+    else:
+        command_list = _Parse("", filename)
     include_dirs = []
 
     for commandobject in command_list:
@@ -155,7 +178,6 @@ def ExtractInstallFilesWithContext(variables, install_list, filename=None, input
                 #print("include dirs:",repr(include_dirs))
 
 def ExpandArgs(variables, args, filename=None):
-    rex  = re.compile(r'(\$\{[^\}]+\})')
     fixed_args = []
     for arg in args:
         fixed_parts = []
@@ -163,7 +185,7 @@ def ExpandArgs(variables, args, filename=None):
         if arg.startswith("$<BUILD_INTERFACE:"):
             arg = arg[len("$<BUILD_INTERFACE:"): -1]
 
-        parts = rex.split(arg)
+        parts = _variableRegex.split(arg)
         for part in parts:
             if part.startswith("${"):
                 name = part[2:-1].lower()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import ply.lex as lex
+from .plytables import CloneLexer
 
 tokens = (
    'SYMBOL',
@@ -45,5 +46,10 @@ class CMakeLexerClass(object):
             print("Illegal character %s at line %i." % (repr(t.value[0]),t.lexer.lineno))
         t.lexer.skip(1)
 
+_prototypeLexer = None
+
 def CMakeLexer(filename=None):
-    return lex.lex(object=CMakeLexerClass(filename))
+    global _prototypeLexer
+    if _prototypeLexer is None:
+        _prototypeLexer = lex.lex(object=CMakeLexerClass())
+    return CloneLexer(_prototypeLexer,CMakeLexerClass(filename))
@@ -17,7 +17,7 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 import kbindinggenerator.cmakelexer as cmakelexer
-import ply.yacc as yacc
+from .plytables import BuildParser
 
 class CMakeThing(object):
     def isString(self):
@@ -65,13 +65,14 @@ class CMakeParser(object):
 
     def __init__(self):
         self.tokens = cmakelexer.tokens
-        yacc.yacc (module = self, tabmodule = "cmakeParserTab")
-        self._parse = yacc.parse
+        self._parse = BuildParser(self, "cmakeParserTab").parse
+        self.lexer = cmakelexer.CMakeLexer()
 
         self.values = {}
 
     def parse(self, s, filename=None, debug=0):
-        self.lexer = cmakelexer.CMakeLexer(filename)
+        self.lexer.lexmodule._filename = filename
+        self.lexer.lineno = 1
         self.lexer.input(s)
         self.result = None
         self.filename = filename
@@ -93,9 +94,8 @@ class CMakeParser(object):
     def p_statement_list2(self, p):
         """statement_list : statement_list statement"""
         if p[2] is not None:
-            p[0] = p[1] + [p[2]]
-        else:
-            p[0] = p[1]
+            p[1].append(p[2])
+        p[0] = p[1]
 
     def p_statement1(self, p):
         """statement : SYMBOL LPAREN argument_list RPAREN"""
@@ -115,7 +115,8 @@ class CMakeParser(object):
         if len(p) == 2:
             p[0] = p[1]
         else:
-            p[0] = p[1] + p[2]
+            p[1].extend(p[2])
+            p[0] = p[1]
 
     def p_argument1(self, p):
         """argument : SYMBOL"""
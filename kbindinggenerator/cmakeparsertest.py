@@ -18,7 +18,12 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 import unittest
+import os
+import os.path
+import shutil
+import tempfile
 import cmakeparser
+import cmake
 
 class TestCMakeParser(unittest.TestCase):
 
@@ -146,5 +151,35 @@ else()
 endif()
 """)
 
+class TestCMakeFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.writeFile("CMakeLists.txt", "set(foo_HEADERS foo.h)\nadd_subdirectory(sub)\ninstall(FILES ${foo_HEADERS} DESTINATION include)\n")
+        self.writeFile("foo.h", "")
+        os.mkdir(os.path.join(self.tmpdir, "sub"))
+        self.writeFile("sub/CMakeLists.txt", "install(FILES bar.h DESTINATION include)\n")
+        self.writeFile("sub/bar.h", "")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def writeFile(self, name, text):
+        with open(os.path.join(self.tmpdir, name), "w") as fhandle:
+            fhandle.write(text)
+
+    def testExtractInstallFiles(self):
+        filename = os.path.join(self.tmpdir, "CMakeLists.txt")
+        expected = [os.path.join(self.tmpdir, "sub", "bar.h"), os.path.join(self.tmpdir, "foo.h")]
+        self.assertEqual(cmake.ExtractInstallFiles(filename), expected)
+        commands = cmake.ParseCMakeFile(filename)
+        self.assertTrue(cmake.ParseCMakeFile(filename) is commands)
+        self.assertEqual(cmake.ExtractInstallFiles(filename), expected)
+
+        self.writeFile("sub/CMakeLists.txt", "install(FILES bar.h baz.h DESTINATION include)\n")
+        self.writeFile("sub/baz.h", "")
+        self.assertEqual(cmake.ExtractInstallFiles(filename),
+            expected[:1] + [os.path.join(self.tmpdir, "sub", "baz.h")] + expected[1:])
+
 if __name__ == '__main__':
     unittest.main()
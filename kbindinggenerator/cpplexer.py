@@ -18,6 +18,7 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 import ply.lex as lex
+from .plytables import CloneLexer
 
 class CppLexerClass(object):
     def __init__(self):
@@ -25,14 +26,25 @@ class CppLexerClass(object):
         self.parenStack = []
         self._bareMacros = []
         self._macros = []
+        self._updateIdTypes()
 
     def setBareMacros(self,macroList):
         # macroList - List of strings
         self._bareMacros = macroList
+        self._updateIdTypes()
 
     def setMacros(self,macroList):
         # macroList - List of strings
         self._macros = macroList
+        self._updateIdTypes()
+
+    def _updateIdTypes(self):
+        # Identifier -> (token type, state to begin or None) for t_ID(). The
+        # keywords win over bare macros and bare macros over macros.
+        idTypes = dict.fromkeys(self._macros,("MACROCALL","macro"))
+        idTypes.update(dict.fromkeys(self._bareMacros,("BAREMACRO",None)))
+        idTypes.update(CppLexerClass.keywordTypes)
+        self._idTypes = idTypes
 
     states = (('function', 'inclusive'), ('macro', 'exclusive'), ('operator', 'inclusive'), ('variable', 'inclusive'),\
             ('stmt', 'exclusive'), ('enum', 'inclusive'))
@@ -51,6 +63,16 @@ class CppLexerClass(object):
     cppScalarTypes = ("int", "char", "float", "double", "long", "short", "unsigned",\
         "signed", "bool", "void", "wchar_t")        
 
+    # Keyword -> (token type, state to begin or None). The first group a
+    # keyword is in decides its type.
+    keywordTypes = {'class': ('class','variable'), 'namespace': ('namespace','variable'),
+        'operator': ('operator','operator'), 'enum': ('enum','enum')}
+    for names,tokenType in ((edges + ('new','static_cast'),None), (cppScalarTypes,None), (accessSpecifiers,None),
+            (storageQualifiers,"STORAGE"), (functionQualifiers,None), (cvQualifiers,"CVQUAL")):
+        for name in names:
+            keywordTypes.setdefault(name,(tokenType or name,None))
+    del names,tokenType,name
+
     # Operators (+,-,*,/,%,|,&,~,^,<<,>>, ||, &&, !, <, <=, >, >=, ==, !=)
     operators = ('PLUS', 'MINUS', 'SLASH', 'PERCENT', 'VBAR', 'CARET', #'LSHIFT', 'RSHIFT',
         'LOR', 'LAND', 'BANG', 'LE', 'GE', 'EQ', 'NE',
@@ -257,30 +279,11 @@ class CppLexerClass(object):
             
     def t_ID(self,t):
         r'[A-Za-z_][\w_]*'
-        if t.value in ['class', 'namespace']:
-            t.lexer.begin ('variable')
-            
-        if t.value in CppLexerClass.edges or t.value in ['new', 'static_cast']:
-            t.type = t.value
-            if t.type == 'operator':
-                t.lexer.begin ('operator')
-            if t.type == 'enum' and t.lexer.lexstate != 'function':
-                t.lexer.begin ('enum')
-        elif t.value in CppLexerClass.cppScalarTypes:
-            t.type = t.value
-        elif t.value in CppLexerClass.accessSpecifiers:
-            t.type = t.value
-        elif t.value in CppLexerClass.storageQualifiers:
-            t.type = "STORAGE"
-        elif t.value in CppLexerClass.functionQualifiers:
-            t.type = t.value
-        elif t.value in CppLexerClass.cvQualifiers:
-            t.type = "CVQUAL"
-        elif t.value in self._bareMacros:
-            t.type = "BAREMACRO"
-        elif t.value in self._macros:
-            t.type = "MACROCALL"
-            t.lexer.begin('macro')
+        idType = self._idTypes.get(t.value)
+        if idType is not None:
+            t.type,state = idType
+            if state is not None and (state!='enum' or t.lexer.lexstate!='function'):
+                t.lexer.begin(state)
         return t
 
 
@@ -339,9 +342,16 @@ class CppLexerClass(object):
 
 tokens = CppLexerClass.tokens
 
+_prototypeLexer = None
+
 def CppLexer():
+    # Building a lexer compiles and validates all of the rules. Do that once
+    # and give each caller a clone bound to its own CppLexerClass object.
+    global _prototypeLexer
     lexerClass = CppLexerClass()
-    lexer = lex.lex(object=lexerClass)
+    if _prototypeLexer is None:
+        _prototypeLexer = lex.lex(object=CppLexerClass())
+    lexer = CloneLexer(_prototypeLexer,lexerClass)
     lexer.lexmodule = lexerClass
     return lexer
 
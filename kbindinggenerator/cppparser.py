@@ -20,7 +20,7 @@
 import sys
 import re
 from .sealed import sealed
-import ply.yacc as yacc
+from .plytables import BuildParser
 import kbindinggenerator.cpplexer as cpplexer
 import kbindinggenerator.pplexer as pplexer
 import inspect
@@ -33,6 +33,18 @@ def joinp(p, startindex, string=" "):
         i += 1
     return string.join(tmplist)
 
+def CompileMacros(macroList):
+    # Convert the list of macros to regular expressions. Macro which are
+    # already regexs don't need to changed. Bare string macros and their
+    # substituation strings are treated as straight string substituations.
+    compiledMacros = []
+    for item in macroList:
+        if not isinstance(item[0],str):
+            compiledMacros.append(item)
+        else:
+            compiledMacros.append( (re.compile(item[0]), re.escape(item[1])) )
+    return compiledMacros
+
 class CppParser(object):
     """Parser for C++ header files."""
 
@@ -46,10 +58,13 @@ class CppParser(object):
 
         self.lexer = cpplexer.CppLexer()
         self.lexer.begin('variable')
+        self._preprocessor = pplexer.Preprocessor()
         self._resetState()
         self.tokens = cpplexer.tokens
-        yacc.yacc(module = self, tabmodule = "cppParserTab")
-        self._parse = yacc.parse
+        self._parse = BuildParser(self, "cppParserTab").parse
+        # Set countTokens to count the tokens read into tokenCount.
+        self.countTokens = False
+        self.tokenCount = 0
 
     def _resetState(self):
         self.filename = None
@@ -136,33 +151,36 @@ class CppParser(object):
         
         If a parse error is encountered, the whole program is exited. Sorry.
         """
+        chewedText = self._preprocessor.preprocess(text, self._preprocessorValues, CompileMacros(self._preprocessorSubstitutionMacros))
+        return self.parsePreprocessed(symbolData, chewedText, filename, debugLevel)
+
+    def parsePreprocessed(self, symbolData, text, filename=None, debugLevel = 0):
+        """Parse C++ header text which has already been through the preprocessor.
+
+        See parse() for the arguments.
+        """
         self._resetState()
         self.filename = filename
         
         self.symbolData = symbolData
         self.scope = self.symbolData.newScope()
-        
-        chewedText = pplexer.preprocess(text, self._preprocessorValues, self.__compileMacros(self._preprocessorSubstitutionMacros))
 
-        self.lexer.input(chewedText)
+        self.lexer.input(text)
         self.lexer.lineno = 1
         self.lexer.lexpos = 0
 
-        result = self._parse(debug = debugLevel, lexer = self.lexer)
+        if self.countTokens:
+            result = self._parse(debug = debugLevel, lexer = self.lexer, tokenfunc = self._countedToken)
+        else:
+            result = self._parse(debug = debugLevel, lexer = self.lexer)
         return self.scope
         
-    def __compileMacros(self, macroList):
-        # Convert the list of macros to regular expressions. Macro which are
-        # already regexs don't need to changed. Bare string macros and their
-        # substituation strings are treated as straight string substituations.
-        compiledMacros = []
-        for item in macroList:
-            if not isinstance(item[0],str):
-                compiledMacros.append(item)
-            else:
-                compiledMacros.append( (re.compile(item[0]), re.escape(item[1])) )
-        return compiledMacros
-
+    def _countedToken(self):
+        token = self.lexer.token()
+        if token is not None:
+            self.tokenCount += 1
+        return token
+        
     def _pushScope(self, newScope):
         self._scopeStack.append(self.scope)
         self.scope = newScope
@@ -600,6 +600,20 @@ bool operator== (const GeoDataLatLonAltBox& lhs, const GeoDataLatLonAltBox& rhs)
 };
 """)
 
+    def testSecondParser(self):
+        # Parsers share their tables and clone their lexers.
+        parser = cppparser.CppParser()
+        self.assertTrue(parser._parse.__self__.action is self.parser._parse.__self__.action)
+        self.assertFalse(parser.lexer is self.parser.lexer)
+        code = """
+            class Foo {
+                public:
+                    virtual int bar ()=0;
+            };
+            """
+        scope = parser.parse(self.syms, code)
+        self.assertEqual(CleanWhitespace(scope.format()),CleanWhitespace(code))
+
 #     def testFriendOperator2(self):
 #         self.parser.bareMacros = qtkdemacros.QtBareMacros(["KDECORE_EXPORT"])
 #         self.mirrorTest("""
@@ -18,11 +18,22 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 from .sealed import sealed
+import kbindinggenerator.typeref as typeref
 #from argvalidate import accepts,returns,one_of
+import os
+import sys
 import types
+import pickle
 
 RETURN_INDENT = 24
 
+# Verify the incrementally maintained type index against a full rebuild after
+# every update. Slow, meant for debugging.
+CHECK_TYPE_INDEX = os.environ.get("TWINE2_CHECK_TYPE_INDEX","")!=""
+
+# Qualifiers of every function which has none, see Function.addQualifier().
+_NO_QUALIFIERS = frozenset()
+
 class SymbolData(object):
     """Represent the contents of a C++ header file.
      
@@ -51,7 +62,16 @@ class SymbolData(object):
         self._scopes = []
         self._typeIndex = None
         self._nsIndex = None
+        self._pendingIndex = {}
+        self._indexedScopes = set()
+        self._lookupCache = {}
+        self._enumIndex = {}
+        self._lookupCounts = [0,0]
 
+    def lookupCounts(self):
+        """Get the number of type lookups and how many of them missed the lookup cache."""
+        return tuple(self._lookupCounts)
+        
     def lookupType(self,name,context):
         resolvedType = self._safeLookupType(name,context)
         if resolvedType is None:
@@ -59,9 +79,23 @@ class SymbolData(object):
         return resolvedType
     
     def _safeLookupType(self,name,context):
-        if self._typeIndex is None:
-            self._buildTypeIndex()
-            
+        self._updateTypeIndex()
+        
+        # Results, including misses, stay valid until the type index or the
+        # base class list of a class changes.
+        key = (name,context)
+        counts = self._lookupCounts
+        counts[0] += 1
+        try:
+            return self._lookupCache[key]
+        except KeyError:
+            pass
+        counts[1] += 1
+        resolvedType = self._resolveType(name,context)
+        self._lookupCache[key] = resolvedType
+        return resolvedType
+        
+    def _resolveType(self,name,context):
         contextFqName = context.fqName() if context is not None else None
         if contextFqName is not None:
             pathParts = contextFqName.split("::")
@@ -84,30 +118,109 @@ class SymbolData(object):
                     
         return None
             
+    def _updateTypeIndex(self):
+        if self._typeIndex is None:
+            self._buildTypeIndex()
+        elif self._pendingIndex:
+            pending = self._pendingIndex
+            self._pendingIndex = {}
+            indexSize = len(self._typeIndex)
+            for item in pending.values():
+                if not self._indexPending(item):
+                    self._buildTypeIndex()
+                    break
+            if len(self._typeIndex)!=indexSize:
+                self._lookupCache = {}
+            if CHECK_TYPE_INDEX:
+                self._checkTypeIndex()
+
     def _buildTypeIndex(self):
-        self._typeIndex = {}
+        self._typeIndex = self._fullTypeIndex()
+        self._pendingIndex = {}
+        self._lookupCache = {}
+        self._indexedScopes = set(id(scope) for scope in self._scopes)
+
+    def _fullTypeIndex(self):
+        typeIndex = {}
         
         def IndexScope(scope):
             for item in scope:
                 if isinstance(item,SymbolData.CppClass):
-                    if item.fqName() in self._typeIndex:
-                        if not self._typeIndex[item.fqName()].opaque():
+                    if item.fqName() in typeIndex:
+                        if not typeIndex[item.fqName()].opaque():
                             continue
-                    self._typeIndex[item.fqName()] = item
+                    typeIndex[item.fqName()] = item
                     IndexScope(item)
                 elif isinstance(item,SymbolData.Enum) or isinstance(item,SymbolData.Typedef):
                     fqName = item.fqName()
                     if fqName is not None:
-                        self._typeIndex[item.fqName()] = item
+                        typeIndex[item.fqName()] = item
                 elif isinstance(item,SymbolData.Namespace):
-                    self._typeIndex[item.fqName()] = item
+                    typeIndex[item.fqName()] = item
                     IndexScope(item)
                 elif isinstance(item,SymbolData.Variable):
-                    self._typeIndex[item.fqName()] = item
+                    typeIndex[item.fqName()] = item
 
         for scope in self._scopes:
             IndexScope(scope)
-        #print("index: " + repr(self._typeIndex.keys()))
+        #print("index: " + repr(typeIndex.keys()))
+        return typeIndex
+
+    def _indexPending(self,item):
+        # Add a newly inserted item (or top level scope) and its contents to
+        # the type index. Returns False if the item's name collides with a
+        # different indexed entity. Which one wins depends on the order of the
+        # scopes, so the caller has to rebuild the whole index in that case.
+        if isinstance(item,SymbolData.TopLevelScope):
+            if id(item) not in self._indexedScopes:
+                if not any(scope is item for scope in self._scopes):
+                    return True
+                self._indexedScopes.add(id(item))
+            return self._indexScopeIncremental(item)
+        
+        scope = item.parentScope()
+        if scope is None:
+            return True
+        while not isinstance(scope,SymbolData.TopLevelScope):
+            if isinstance(scope,SymbolData.CppClass):
+                if self._typeIndex.get(scope.fqName()) is not scope:
+                    return True
+            elif not isinstance(scope,SymbolData.Namespace):
+                return True
+            scope = scope.parentScope()
+        if id(scope) not in self._indexedScopes:
+            return True
+        return self._indexItemIncremental(item)
+        
+    def _indexScopeIncremental(self,scope):
+        for item in scope:
+            if not self._indexItemIncremental(item):
+                return False
+        return True
+        
+    def _indexItemIncremental(self,item):
+        if isinstance(item,_INDEXED_TYPES):
+            fqName = item.fqName()
+            if fqName is None:
+                return True
+            current = self._typeIndex.get(fqName)
+            if current is item:
+                return True
+            if current is not None:
+                return False
+            self._typeIndex[fqName] = item
+            if isinstance(item,(SymbolData.CppClass,SymbolData.Namespace)):
+                return self._indexScopeIncremental(item)
+        return True
+
+    def _checkTypeIndex(self):
+        fullIndex = self._fullTypeIndex()
+        if fullIndex.keys()!=self._typeIndex.keys():
+            raise AssertionError("Incremental type index differs from a full rebuild. Missing: %s Extra: %s" %
+                (sorted(fullIndex.keys()-self._typeIndex.keys()), sorted(self._typeIndex.keys()-fullIndex.keys())))
+        for key,value in fullIndex.items():
+            if self._typeIndex[key] is not value:
+                raise AssertionError("Incremental type index has the wrong entity for '%s'." % (key,))
 
     def lookupNamespace(self,nsName):
         if self._nsIndex is None:
@@ -131,10 +244,39 @@ class SymbolData(object):
     def _changed(self):
         self._typeIndex = None
         self._nsIndex = None
+        self._pendingIndex = {}
+        self._enumsChanged()
+
+    def _itemInserted(self,scope,item):
+        if item.parentScope() is not scope:
+            # The item is being moved here from another scope.
+            self._changed()
+            return
+        if isinstance(item,SymbolData.Namespace):
+            self._nsIndex = None
+        elif isinstance(item,SymbolData.Enum):
+            self._enumsChanged()
+        if self._typeIndex is not None and isinstance(item,_INDEXED_TYPES):
+            self._pendingIndex[id(item)] = item
+            
+    def _itemRemoved(self,item):
+        if isinstance(item,_INDEXED_TYPES):
+            self._changed()
+            
+    def _scopeAdded(self,scope):
+        self._nsIndex = None
+        if self._typeIndex is not None:
+            self._pendingIndex[id(scope)] = scope
+            
+    def _opaqueChanged(self,cppClass):
+        if id(cppClass) not in self._pendingIndex:
+            self._changed()
+            
+    def _basesChanged(self,cppClass):
+        self._lookupCache = {}
 
     def dumpKnownTypes(self):
-        if self._typeIndex is None:
-            self._buildTypeIndex()
+        self._updateTypeIndex()
         
         print("Known types (%i)---------------------------------" % (len(self._typeIndex.keys()),) )
         print("Top levels: %i" % (len(self._scopes),) )
@@ -145,11 +287,9 @@ class SymbolData(object):
     def lookupEnum(self,value,context):
         scope = context
         while scope is not None:
-            for item in scope:
-                if isinstance(item,SymbolData.Enum):
-                    for enum in item:
-                        if enum.name()==value:
-                            return item
+            enum = self._scopeEnumerators(scope).get(value)
+            if enum is not None:
+                return enum
             scope = scope.parentScope()
             
         if isinstance(context,self.SipClass):
@@ -161,9 +301,27 @@ class SymbolData(object):
                         return enum
         return None
 
+    def _scopeEnumerators(self,scope):
+        # Map of enumerator names to the first enum in the scope which has them.
+        index = self._enumIndex.get(scope)
+        if index is None:
+            index = {}
+            for item in scope:
+                if isinstance(item,SymbolData.Enum):
+                    for enumerator in item:
+                        if isinstance(enumerator,SymbolData.Enumerator):
+                            index.setdefault(enumerator.name(),item)
+            self._enumIndex[scope] = index
+        return index
+        
+    def _enumsChanged(self):
+        if self._enumIndex:
+            self._enumIndex = {}
+
     def newScope(self):
         scope = self.TopLevelScope(self)
         self._scopes.append(scope)
+        self._scopeAdded(scope)
         return scope
         
     def removeScope(self,scope):
@@ -172,6 +330,53 @@ class SymbolData(object):
         self._scopes.remove(scope)
         self._changed()
 
+    def addScope(self,scope):
+        """Add an existing top level scope to this symbol data.
+        
+        The scope may belong to another SymbolData object, e.g. when imported
+        scopes are shared between several symbol data objects."""
+        if scope in self._scopes:
+            return
+        self._scopes.append(scope)
+        self._scopeAdded(scope)
+        
+    def dumpScopes(self,scopes,fhandle):
+        """Serialise a list of top level scopes to a binary file object.
+        
+        The scopes can be read back with `loadScopes()`, also into a
+        different SymbolData object or process."""
+        pickler = pickle.Pickler(fhandle,pickle.HIGHEST_PROTOCOL)
+        persistentIds = self._persistentIds()
+        def persistentId(obj):
+            return persistentIds.get(id(obj))
+        pickler.persistent_id = persistentId
+        pickler.dump(list(scopes))
+        
+    def loadScopes(self,fhandle):
+        """Read scopes written by `dumpScopes()` and add them to this SymbolData.
+        
+        Returns the list of loaded scopes."""
+        persistentObjects = self._persistentObjects()
+        unpickler = pickle.Unpickler(fhandle)
+        def persistentLoad(pid):
+            return persistentObjects[pid]
+        unpickler.persistent_load = persistentLoad
+        scopes = unpickler.load()
+        self._scopes.extend(scopes)
+        for scope in scopes:
+            self._scopeAdded(scope)
+        return scopes
+        
+    def _persistentObjects(self):
+        return {'symbolData': self,
+                'public': self.ACCESS_PUBLIC,
+                'private': self.ACCESS_PRIVATE,
+                'protected': self.ACCESS_PROTECTED,
+                'signals': self.ACCESS_SIGNALS}
+        
+    def _persistentIds(self):
+        return dict( (id(value),key) for (key,value) in self._persistentObjects().items() )
+
     @classmethod
     def _indentString(cls, indent):
         return ' ' * (4*indent)
@@ -181,19 +386,31 @@ class SymbolData(object):
     class Entity(object):
         """Represents an entity and a scope which can hold other entities.
         
-        This class isn't meant to be used directly but is typically subclassed."""
+        This class isn't meant to be used directly but is typically subclassed.
+        The entity classes use __slots__ to keep the many small objects made
+        while importing sip files compact."""
+        __slots__ = ('_scope', '_fqNameCache', '_filename', '_lineno', '_items', '_itemCounts', '_itemPositions', '_name')
         @sealed
         def __init__(self, parentScope, name, filename, lineno):
             self._scope = parentScope
+            self._fqNameCache = None
             self._filename = filename
             self._lineno = lineno
             if self._scope is not None:
                 self._scope.insertIntoScope(None, self)
-            self._items = []
+            # Most entities never hold any items, so these start out as the
+            # shared empty tuple and are replaced by the first insert.
+            self._items = ()
+            self._itemCounts = ()       # item -> number of times it is in _items
+            self._itemPositions = None  # item -> first index in _items, built when needed
             self._name = name
         
         def _fixScope(self):
             # A bit of an ugly hack to 
+            for item in self:
+                if isinstance(item,SymbolData.Entity) and item._scope is not self:
+                    self._symbolData()._changed()
+                    break
             for item in self:
                 if isinstance(item,SymbolData.Entity):
                     if item._scope is not self:
@@ -202,7 +419,12 @@ class SymbolData(object):
                         print("Old scope: " + repr(item._scope._name) + " " + repr(id(item._scope)) + " "+repr(type(item._scope)))
                         print("Correct scope: " + repr(self._name) + " " + repr(id(self)) + " "+repr(type(item._scope)))
                     item._scope = self
+                    item._invalidateNames()
                     item._fixScope()
+
+        def _invalidateNames(self):
+            # Called when the entity or one of its parents has been moved.
+            self._fqNameCache = None
         
         #@returns(one_of(str,types.NoneType))
         def name(self):
@@ -210,6 +432,9 @@ class SymbolData(object):
             
         #@returns(str)
         def fqName(self):
+            if self._fqNameCache is not None:
+                return self._fqNameCache
+                
             parentFqn = self.parentScope().fqName()
             
             # FIXME name() should never be None. This only happens because the typedef parsing is broken with enums.
@@ -217,16 +442,17 @@ class SymbolData(object):
                 return ""
             
             if parentFqn is not None:
-                return parentFqn + "::" + self.name()
+                self._fqNameCache = sys.intern(parentFqn + "::" + self.name())
             else:
-                return self.name()
+                self._fqNameCache = sys.intern(self.name())
+            return self._fqNameCache
 
         def insertIntoScope(self, name, cppMember):
-            if cppMember not in self._items:
-                self._items.append(cppMember)
+            if cppMember not in self._itemCounts:
+                self._appendItem(cppMember)
             #if name is not None:
             #    self._names[name] = cppMember
-            self._killCache(cppMember)
+            self._symbolData()._itemInserted(self,cppMember)
 
         def __str__(self):
             return '\n'.join( (str(item) for item in self._items) )
@@ -244,30 +470,61 @@ class SymbolData(object):
             return self._items[key]
             
         def __setitem__(self, key, value):
-            oldValue = self._items.get(key,None)
-            
-            self._items[key] = value
-            
-            self._killCache(oldValue)
-            self._killCache(value)
+            self._itemList()[key] = value
+            self._recountItems()
+            self._symbolData()._changed()
             
         def __iter__(self):
             return self._items.__iter__()
             
-        def __delitem__(self,item):
-            self._items.__delitem__(item)
-            self._killCache(item)
+        def __delitem__(self,key):
+            removed = self._items[key]
+            self._itemList().__delitem__(key)
+            self._itemPositions = None
+            syms = self._symbolData()
+            for item in (removed if isinstance(key,slice) else [removed]):
+                count = self._itemCounts[item]
+                if count==1:
+                    del self._itemCounts[item]
+                else:
+                    self._itemCounts[item] = count-1
+                syms._itemRemoved(item)
+                
+        def __contains__(self,item):
+            return item in self._itemCounts
             
         def index(self,item):
-            return self._items.index(item)
+            if item not in self._itemCounts:
+                raise ValueError("%r is not in scope" % (item,))
+            if self._itemPositions is None:
+                positions = {}
+                for i,x in enumerate(self._items):
+                    positions.setdefault(x,i)
+                self._itemPositions = positions
+            return self._itemPositions[item]
             
         def append(self,item):
-            self._items.append(item)
-            self._killCache(item)
-        
-        def _killCache(self,targetItem):
-            syms = self._symbolData()
-            syms._changed()
+            self._appendItem(item)
+            self._symbolData()._itemInserted(self,item)
+            
+        def _appendItem(self,item):
+            if not self._itemCounts:
+                self._itemCounts = {}
+            if self._itemPositions is not None and item not in self._itemCounts:
+                self._itemPositions[item] = len(self._items)
+            self._itemList().append(item)
+            self._itemCounts[item] = self._itemCounts.get(item,0) + 1
+
+        def _itemList(self):
+            if isinstance(self._items,tuple):
+                self._items = list(self._items)
+            return self._items
+            
+        def _recountItems(self):
+            self._itemCounts = {}
+            for item in self._items:
+                self._itemCounts[item] = self._itemCounts.get(item,0) + 1
+            self._itemPositions = None
             
         def parentScope(self):
             return self._scope
@@ -285,6 +542,7 @@ class SymbolData(object):
                 return "???:%i" % (self._lineno,)
         
     class TopLevelScope(Entity):
+        __slots__ = ('_symbolDataPtr', '_headerFilename')
         @sealed
         def __init__(self,symbolData):
             SymbolData.Entity.__init__(self, None, None, None, -1)
@@ -317,6 +575,7 @@ class SymbolData(object):
         
     class Namespace(Entity):
         """Represents a C++ style namespace."""
+        __slots__ = ()
         @sealed
         def __init__(self, parentScope, name, filename, lineno):
             SymbolData.Entity.__init__(self, parentScope, name, filename, lineno)
@@ -326,6 +585,7 @@ class SymbolData(object):
             return pre + "namespace " + self._name + "\n"+pre+"{\n" + SymbolData.Entity.format(self,indent) + pre + "};\n"
 
     class _CppEntity(Entity):
+        __slots__ = ('_access',)
         @sealed
         def __init__(self, parentScope, name, filename, lineno):
             SymbolData.Entity.__init__(self, parentScope, name, filename, lineno)
@@ -349,26 +609,32 @@ class SymbolData(object):
             return self.format()
             
     class Enum(_CppEntity):
+        __slots__ = ('_enumerators',)
         @sealed
         def __init__(self, parentScope, name, filename, lineno):
             SymbolData._CppEntity.__init__(self, parentScope, name, filename, lineno)
             self._enumerators = []
             
         def fqName(self):
+            if self._fqNameCache is not None:
+                return self._fqNameCache
+                
             if self.name() is None:
                 return None
                 
             parentFqn = self.parentScope().fqName() if self.parentScope() is not None else None
             if parentFqn is not None:
-                return parentFqn + "::" + self.name()
+                self._fqNameCache = sys.intern(parentFqn + "::" + self.name())
             else:
-                return self.name()
+                self._fqNameCache = sys.intern(self.name())
+            return self._fqNameCache
             
         def appendEnumerator(self,enumerator):
             self.append(enumerator)
             
         def append(self,enumerator):
             self._enumerators.append(enumerator)
+            self._notifyEnumeratorsChanged()
             
         def __len__(self):
             return len(self._enumerators)
@@ -378,10 +644,18 @@ class SymbolData(object):
             
         def __setitem__(self, key, value):
             self._enumerators[key] = value
+            self._notifyEnumeratorsChanged()
+            
+        def _notifyEnumeratorsChanged(self):
+            if self._scope is not None:
+                self._symbolData()._enumsChanged()
             
         def __iter__(self):
             return self._enumerators.__iter__()
             
+        def __contains__(self,item):
+            return item in self._enumerators
+            
         def format(self,indent=0):
             pre = SymbolData._indentString(indent)
             accu = []
@@ -403,6 +677,7 @@ class SymbolData(object):
             return ''.join(accu)
             
     class Enumerator(object):
+        __slots__ = ('_name', '_value')
         @sealed
         def __init__(self,name,value):
             self._name = name
@@ -421,6 +696,7 @@ class SymbolData(object):
                 return self._name + "=" + self._value
 
     class CppClass(_CppEntity):
+        __slots__ = ('_bases', '_opaque', '_macros')
         @sealed
         def __init__(self,parentScope, name, filename=None, lineno=-1):
             SymbolData._CppEntity.__init__(self, parentScope, name, filename, lineno)
@@ -431,10 +707,16 @@ class SymbolData(object):
         #@accepts(str)
         def addBase(self, base):
             self._bases.append(base)
+            self._notifyBasesChanged()
             
         #@accepts(list)
         def setBases(self,baseList):
             self._bases = baseList
+            self._notifyBasesChanged()
+            
+        def _notifyBasesChanged(self):
+            if self._scope is not None:
+                self._symbolData()._basesChanged(self)
         
         #@returns(list)
         def bases(self):
@@ -445,6 +727,8 @@ class SymbolData(object):
         
         #@accepts(bool)
         def setOpaque(self,opaque):
+            if opaque!=self._opaque and self._scope is not None:
+                self._symbolData()._opaqueChanged(self)
             self._opaque = opaque
             
         #@returns(bool)
@@ -493,11 +777,14 @@ class SymbolData(object):
             return ''.join(accu)
 
     class Argument(object):
+        __slots__ = ('_argumentType', '_typeRef', '_argumentName', '_defaultValue', '_defaultTypes', '_functionPtr', '_template')
         # Immutable.
         
         @sealed
         def __init__(self, argumentType, argumentName = None, argumentValue = None, template = None, defaultTypes = None):
-            self._argumentType = argumentType
+            # Identical types share one interned TypeRef and string.
+            self._typeRef = typeref.ParseType(argumentType) if argumentType is not None else None
+            self._argumentType = self._typeRef.text() if self._typeRef is not None else None
             self._argumentName = argumentName
             self._defaultValue = argumentValue  # string (no leading '=') of default value/expression
             self._defaultTypes = defaultTypes   # any types pulled out of the default value expression
@@ -509,6 +796,10 @@ class SymbolData(object):
         def argumentType(self):
             return self._argumentType
             
+        def typeRef(self):
+            """The argument type as an interned typeref.TypeRef, or None."""
+            return self._typeRef
+            
         #@returns(one_of(str,types.NoneType))
         def name(self):
             return self._argumentName
@@ -528,6 +819,7 @@ class SymbolData(object):
                 ("" if self._defaultValue is None else " = "+self._defaultValue)
             
     class FunctionArgument(Argument):
+        __slots__ = ('_returnType', '_functionArguments')
         # Immutable
         @sealed
         def __init__(self, argumentName, returnType, functionArguments):
@@ -540,6 +832,7 @@ class SymbolData(object):
             
     class Variable(_CppEntity):
         """Represents a single variable declaration."""
+        __slots__ = ('_storage', '_argument', '_bitfield')
         @sealed
         def __init__(self,parentScope, name, filename, lineno):
             SymbolData._CppEntity.__init__(self, parentScope, name, filename, lineno)
@@ -580,14 +873,15 @@ class SymbolData(object):
 
     class Function(_CppEntity):
         """Represents a C++ function or method if the parent scope is a class."""
+        __slots__ = ('_return', '_storage', '_arguments', '_qualifier', '_template')
         @sealed
         def __init__(self,parentScope, name, filename, lineno):
             SymbolData._CppEntity.__init__(self, parentScope, name, filename, lineno)
             self._return = None
             self._storage = None
-            self._arguments = []
-            self._qualifier = set()
-            self._template = []
+            self._arguments = ()
+            self._qualifier = _NO_QUALIFIERS
+            self._template = ()
 
         def setStorage(self,storage):
             self._storage = storage
@@ -608,6 +902,8 @@ class SymbolData(object):
             return self._arguments
 
         def addQualifier(self,qualifier):
+            if self._qualifier is _NO_QUALIFIERS:
+                self._qualifier = set()
             self._qualifier.add(qualifier)
 
         def qualifier(self):
@@ -615,7 +911,7 @@ class SymbolData(object):
 
         def setTemplate(self, template):
             if template is None:
-                self._template = []
+                self._template = ()
             else:
                 self._template = template
                 
@@ -661,6 +957,7 @@ class SymbolData(object):
 
     class Constructor(Function):
         """Represents a constructor."""
+        __slots__ = ()
         @sealed
         def __init__(self,parentScope, name, filename, lineno):
             SymbolData.Function.__init__(self, parentScope, name, filename, lineno)
@@ -683,6 +980,7 @@ class SymbolData(object):
             
     class Destructor(Function):
         """Represents a destructor."""
+        __slots__ = ()
         @sealed
         def __init__(self,parentScope, name, filename, lineno):
             SymbolData.Function.__init__(self, parentScope, name, filename, lineno)
@@ -707,6 +1005,7 @@ class SymbolData(object):
             return ''.join(accu)
             
     class Typedef(_CppEntity):
+        __slots__ = ('_argumentType',)
         @sealed
         def __init__(self,parentScope, name, filename, lineno):
             SymbolData._CppEntity.__init__(self, parentScope, name, filename, lineno)
@@ -729,6 +1028,7 @@ class SymbolData(object):
                 return pre + "typedef\n" + " " + contents
                 
     class FunctionPointerTypedef(Typedef):
+        __slots__ = ('_functionArgument',)
         @sealed
         def __init__(self,parentScope, functionArgument, filename, lineno):
             SymbolData.Typedef.__init__(self,parentScope, functionArgument.name(), filename, lineno)
@@ -739,6 +1039,7 @@ class SymbolData(object):
             return pre + "typedef "+ self._functionArgument.format() + ";\n"
                 
     class EnumTypedef(Typedef):
+        __slots__ = ('_enumDecl',)
         @sealed
         def __init__(self,parentScope, name, enumDecl, filename, lineno):
             SymbolData.Typedef.__init__(self,parentScope, name, filename, lineno)
@@ -766,6 +1067,7 @@ class SymbolData(object):
             return ''.join(accu)
                 
     class Macro(object):
+        __slots__ = ('_name',)
         @sealed
         def __init__(self, name):
             self._name = name
@@ -774,6 +1076,7 @@ class SymbolData(object):
             return self._name
         
     class ScopedMacro(_CppEntity):
+        __slots__ = ('_argument',)
         @sealed
         def __init__(self,parentScope, name, filename, lineno):
             SymbolData._CppEntity.__init__(self, parentScope, name, filename, lineno)
@@ -790,6 +1093,7 @@ class SymbolData(object):
                 return pre + self._name + "(" + self._argument + ")\n"
                 
     class Comment(Entity):
+        __slots__ = ('_comment',)
         @sealed
         def __init__(self, parentScope, filename=None, lineno=-1):
             SymbolData.Entity.__init__(self, parentScope, None, filename, lineno)
@@ -803,4 +1107,7 @@ class SymbolData(object):
             
         def format(self,indent=0):
             return self._comment
+
+# Entity types which appear in the type index.
+_INDEXED_TYPES = (SymbolData.CppClass, SymbolData.Enum, SymbolData.Typedef, SymbolData.Namespace, SymbolData.Variable)
             
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import unittest
+import cppparser
+import cppsymboldata
+
+class TestTypeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = cppparser.CppParser()
+        self.syms = cppsymboldata.SymbolData()
+        self.oldCheck = cppsymboldata.CHECK_TYPE_INDEX
+        cppsymboldata.CHECK_TYPE_INDEX = True
+        self.scope = self.parser.parse(self.syms, """
+            namespace Foo {
+                class Bar {
+                public:
+                    class Inner {};
+                };
+            }
+            class Qux;
+            """)
+
+    def tearDown(self):
+        cppsymboldata.CHECK_TYPE_INDEX = self.oldCheck
+
+    def testInsert(self):
+        bar = self.syms.lookupType("Foo::Bar",self.scope)
+        typeIndex = self.syms._typeIndex
+
+        baz = self.syms.CppClass(bar,"Baz")
+        self.syms.Typedef(baz,"BazList",None,-1)
+        self.assertTrue(self.syms.lookupType("BazList",baz) is baz[0])
+        self.assertTrue(self.syms.lookupType("Baz",bar) is baz)
+        self.assertTrue(self.syms._typeIndex is typeIndex)
+
+    def testNewScope(self):
+        self.syms.lookupType("Foo::Bar",self.scope)
+        scope = self.parser.parse(self.syms, "namespace Foo { class Zap {}; }")
+        self.assertTrue(self.syms.lookupType("Zap",self.syms.lookupType("Foo::Bar",self.scope)) is scope[0][0])
+        self.assertEqual(len(self.syms.lookupNamespace("Foo")),2)
+
+    def testOpaque(self):
+        qux = self.syms.lookupType("Qux",self.scope)
+        self.assertTrue(qux.opaque())
+        newQux = self.syms.CppClass(self.scope,"Qux")
+        self.assertTrue(self.syms.lookupType("Qux",self.scope) is newQux)
+        newQux.setOpaque(True)
+        self.assertTrue(self.syms.lookupType("Qux",self.scope) is newQux)
+        qux.setOpaque(False)
+        self.assertTrue(self.syms.lookupType("Qux",self.scope) is qux)
+
+    def testLookupCache(self):
+        qux = self.syms.lookupType("Qux",self.scope)
+        self.assertRaises(KeyError,self.syms.lookupType,"Inner",qux)
+        qux.setBases(["Foo::Bar"])
+        inner = self.syms.lookupType("Inner",qux)
+        self.assertTrue(inner is self.syms.lookupType("Foo::Bar::Inner",None))
+
+        self.assertRaises(KeyError,self.syms.lookupType,"Extra",qux)
+        extra = self.syms.CppClass(self.syms.lookupType("Foo::Bar",None),"Extra")
+        self.assertTrue(self.syms.lookupType("Extra",qux) is extra)
+
+    def testLookupEnum(self):
+        bar = self.syms.lookupType("Foo::Bar",self.scope)
+        inner = self.syms.lookupType("Inner",bar)
+        mode = self.syms.Enum(bar,"Mode",None,-1)
+        mode.append(self.syms.Enumerator("ModeA",None))
+        self.assertTrue(self.syms.lookupEnum("ModeA",inner) is mode)
+
+        mode.append(self.syms.Enumerator("ModeB",None))
+        self.assertTrue(self.syms.lookupEnum("ModeB",inner) is mode)
+        other = self.syms.Enum(inner,"Other",None,-1)
+        other.append(self.syms.Enumerator("ModeB",None))
+        self.assertTrue(self.syms.lookupEnum("ModeB",inner) is other)
+        self.assertTrue(self.syms.lookupEnum("ModeB",bar) is mode)
+
+    def testRemove(self):
+        bar = self.syms.lookupType("Foo::Bar",self.scope)
+        del bar[bar.index(self.syms.lookupType("Foo::Bar::Inner",self.scope))]
+        self.assertRaises(KeyError,self.syms.lookupType,"Inner",bar)
+        self.syms.removeScope(self.scope)
+        self.assertRaises(KeyError,self.syms.lookupType,"Foo::Bar",None)
+
+class TestScopeItems(unittest.TestCase):
+
+    def testMembership(self):
+        syms = cppsymboldata.SymbolData()
+        scope = syms.newScope()
+        classes = [syms.CppClass(scope,"Foo%i" % i) for i in range(5)]
+        self.assertEqual(list(scope),classes)
+
+        scope.insertIntoScope(None,classes[2])
+        self.assertEqual(len(scope),5)
+        self.assertTrue(classes[3] in scope)
+        self.assertEqual(scope.index(classes[3]),3)
+
+        del scope[scope.index(classes[1])]
+        self.assertFalse(classes[1] in scope)
+        self.assertEqual(scope.index(classes[3]),2)
+        self.assertRaises(ValueError,scope.index,classes[1])
+
+        scope.append(classes[0])
+        self.assertEqual(scope.index(classes[0]),0)
+        del scope[0]
+        self.assertTrue(classes[0] in scope)
+        self.assertEqual(scope.index(classes[0]),3)
+        self.assertEqual(list(scope),[classes[2],classes[3],classes[4],classes[0]])
+
+    def testFqNameAfterMove(self):
+        syms = cppsymboldata.SymbolData()
+        scope = syms.newScope()
+        foo = syms.Namespace(scope,"Foo",None,-1)
+        bar = syms.Namespace(scope,"Bar",None,-1)
+        cls = syms.CppClass(foo,"Zap")
+        nested = syms.CppClass(cls,"Inner")
+        self.assertEqual(nested.fqName(),"Foo::Zap::Inner")
+        self.assertTrue(syms.lookupType("Foo::Zap::Inner",None) is nested)
+
+        bar.append(cls)
+        bar._fixScope()
+        self.assertEqual(cls.fqName(),"Bar::Zap")
+        self.assertEqual(nested.fqName(),"Bar::Zap::Inner")
+        self.assertTrue(syms.lookupType("Bar::Zap::Inner",None) is nested)
+
+if __name__ == '__main__':
+    unittest.main()
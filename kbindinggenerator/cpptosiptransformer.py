@@ -17,7 +17,6 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 import os.path
-import re
 from .sealed import sealed
 import kbindinggenerator.sipsymboldata as sipsymboldata
 import kbindinggenerator.cppsymboldata as cppsymboldata
@@ -235,10 +234,8 @@ _PrimitiveTypes = ["char","signed char","unsigned char","wchar_t","int","unsigne
     "unsigned int","short","unsigned short","long","unsigned long","long long",
     "unsigned long long","float","double","bool","void"]
     
-_templateArgRegex = re.compile(r'^([^<]*)<(.*)>$')
-
 def _ExpandArgument(sipsym,context,argument):
-    className = _ExpandArgumentType(sipsym,context,argument.argumentType())
+    className = _ExpandArgumentType(sipsym,context,argument.typeRef())
 
     defaultValue = argument.defaultValue()
     if defaultValue is not None:
@@ -264,42 +261,31 @@ def _ExpandArgument(sipsym,context,argument):
     newArgument.setAnnotations(argument.annotations())
     return newArgument
     
-def _ExpandArgumentType(sipsym,context,origClassName):
-    className = origClassName
-
-    suffix = ""
-    if className.endswith('*'):
-        className = className[:-1]
-        suffix = '*'
-    if className.endswith('&'):
-        className = className[:-1]
-        suffix = '&'
-        
-    prefix = ""
-    if className.startswith("const "):
-        className = className[6:]
-        prefix = "const "
+def _ExpandArgumentType(sipsym,context,typeRef):
+    # Returns the type text with fully qualified names, or the original text
+    # if nothing changed.
+    name = _ExpandTypeName(sipsym,context,typeRef.name())
+    if typeRef.templateArgs():
+        args = [_ExpandArgumentType(sipsym,context,arg) for arg in typeRef.templateArgs()]
+        if name is typeRef.name() and all(new is arg.text() for new,arg in zip(args,typeRef.templateArgs())):
+            return typeRef.text()
+        return "%s%s<%s>%s" % ("const " if typeRef.isConst() else "",name,",".join(args),typeRef.suffix())
+        
+    if name is typeRef.name():
+        return typeRef.text()
+    return ("const " if typeRef.isConst() else "") + name + typeRef.suffix()
     
-    match = re.match(_templateArgRegex,className)
-    if match is not None:
-        # Got a templated thingy.
-        firstPart = _ExpandArgumentType(sipsym,context,match.group(1))
-        containedPart = _ExpandArgumentType(sipsym,context,match.group(2))
-        return "%s%s<%s>%s" % (prefix,firstPart,containedPart,suffix)
-        
-    else:
-        if className not in _PrimitiveTypes:
-            #    return argument
-            try:
-                classObject = sipsym.lookupType(className,context)
-                if classObject.fqName()==className:
-                    return origClassName # Nothing to do.
-                className = classObject.fqName()
-            except KeyError:
-                print("Warning: %s Unrecognized type '%s' was found when expanding argument type names." % (context.sourceLocation(),className))
-                return origClassName
-
-        return prefix + className + suffix
+def _ExpandTypeName(sipsym,context,className):
+    if className in _PrimitiveTypes:
+        return className
+    try:
+        classObject = sipsym.lookupType(className,context)
+        if classObject.fqName()==className:
+            return className # Nothing to do.
+        return classObject.fqName()
+    except KeyError:
+        print("Warning: %s Unrecognized type '%s' was found when expanding argument type names." % (context.sourceLocation(),className))
+        return className
 
 ###########################################################################
 class MethodAnnotationRule(object):
@@ -84,6 +84,7 @@ class TestCppToSipTransformer(unittest.TestCase):
         
         print("Sip output---------------------------")
         print(scope.format())        
+        return scope
         
     def testConstructor(self):
         self.convert("""
@@ -343,6 +344,20 @@ namespace FooSpace {
 };
 """)
 
+    def testClassNameExpandTemplates(self):
+        scope = self.expandClassNames("""
+namespace FooSpace {
+    class Foo { };
+    class Bar {
+        QMap<int,Foo*> doFooz(Foo **inputFoo, const QList<Foo>& fooList);
+    };
+};
+""")
+        doFooz = scope[1][1][0]
+        self.assertEqual(doFooz.return_().argumentType(),"QMap<int,FooSpace::Foo*>")
+        self.assertEqual([arg.argumentType() for arg in doFooz.arguments()],
+            ["FooSpace::Foo**","const QList<FooSpace::Foo>&"])
+
     def testSanityCheck(self):
         self.sanityCheck("""
 class Foo : QWidget {};
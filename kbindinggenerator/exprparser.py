@@ -17,7 +17,7 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 import ply.lex as lex
-import ply.yacc as yacc
+from .plytables import BuildParser
 
 # Operators (+,-,*,/,%,|,&,~,^,<<,>>, ||, &&, !, <, <=, >, >=, ==, !=)
 operators = ('PLUS', 'MINUS', 'SLASH', 'PERCENT', 'VBAR', 'CARET', #'LSHIFT', 'RSHIFT',
@@ -168,11 +168,11 @@ class ExpressionParser(object):
     precedence = (('left','PLUS','MINUS'), ('left','ASTERISK','SLASH'), ('right','UMINUS'), )
     
     def __init__ (self):
-        self.lexer      = exprLexer
+        # Private lexer and parser objects keep separate instances independent.
+        self.lexer      = exprLexer.clone ()
         self.test       = []       
         self.tokens = tokens        
-        yacc.yacc (module = self, tabmodule = "expressionParserTab")
-        self._parse = yacc.parse
+        self._parse = BuildParser(self, "expressionParserTab").parse
                    
         self.values = {}                   
         
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import os
+import os.path
+import sys
+import io
+import pickle
+import ply.yacc as yacc
+from .cachedir import CacheDirectory, WriteFileAtomic
+
+# Report grammar warnings and write parser.out into the cache directory when
+# the tables are generated.
+DEBUG = os.environ.get("TWINE2_PLY_DEBUG","")!=""
+
+# Tables per grammar name, shared by all parsers built in this process.
+_parserTables = {}
+
+def BuildParser(module,name):
+    """Build a PLY LALR parser for the grammar rules defined on module.
+
+    The parse tables are generated once and then kept in a pickle file in the
+    twine2 cache directory. The file is only used while the grammar's
+    signature still matches. Every parser built from the same grammar in a
+    process shares one set of tables, so building more parsers costs next to
+    nothing. Nothing is written to the package or the working directory.
+
+    Keyword arguments:
+    module -- object or module holding the p_ functions, tokens and precedence.
+    name -- unique name of the grammar, used for the cache file name.
+    """
+    tables = _parserTables.get(name)
+    if tables is None:
+        tables = _LoadParserTables(module,name)
+        _parserTables[name] = tables
+    action,goto,productions = tables
+
+    lr = yacc.LRTable()
+    lr.lr_action = action
+    lr.lr_goto = goto
+    lr.lr_productions = [yacc.MiniProduction(*p) for p in productions]
+    lr.bind_callables(dict( (p[3],getattr(module,p[3])) for p in productions if p[3] ))
+    return yacc.LRParser(lr,getattr(module,'p_error',None))
+
+def CloneLexer(lexer,object):
+    """Copy a PLY lexer and bind its rule methods to another object.
+
+    Use this instead of lexer.clone(object), which in PLY 3.11 keeps only the
+    last master regex of each state and so breaks lexers with many rules.
+    """
+    def Rebind(entry):
+        if not entry or not entry[0]:
+            return entry
+        return (getattr(object,entry[0].__name__),entry[1])
+        
+    clone = lexer.clone()
+    clone.lexstatere = dict( (state,[(cre,[Rebind(entry) for entry in findex]) for cre,findex in ritem])
+                             for state,ritem in lexer.lexstatere.items() )
+    clone.lexstateerrorf = dict( (state,getattr(object,f.__name__)) for state,f in lexer.lexstateerrorf.items() )
+    clone.lexstateeoff = dict( (state,getattr(object,f.__name__)) for state,f in lexer.lexstateeoff.items() )
+    clone.lexmodule = object
+    clone.begin(lexer.lexstate)
+    return clone
+
+def _LoadParserTables(module,name):
+    errorlog = yacc.PlyLogger(sys.stderr) if DEBUG else yacc.NullLogger()
+    pinfo = yacc.ParserReflect(dict( (key,getattr(module,key)) for key in dir(module) ),log=errorlog)
+    pinfo.get_all()
+    if pinfo.error:
+        raise yacc.YaccError("Unable to build parser")
+    signature = pinfo.signature()
+
+    try:
+        directory = CacheDirectory("ply")
+    except OSError:
+        directory = None
+
+    if directory is not None:
+        picklefile = os.path.join(directory,"%s-%s.pickle" % (name,yacc.__tabversion__))
+        lr = yacc.LRTable()
+        try:
+            if lr.read_pickle(picklefile)==signature:
+                return (lr.lr_action,lr.lr_goto,[_ProductionTuple(p) for p in lr.lr_productions])
+        except Exception:
+            pass
+
+    parser = yacc.yacc(module=module,tabmodule=name,debug=DEBUG,write_tables=False,
+                       outputdir=directory,errorlog=errorlog)
+    productions = [_ProductionTuple(p) for p in parser.productions]
+
+    if directory is not None:
+        # Same layout as yacc's own picklefile.
+        buffer = io.BytesIO()
+        for value in (yacc.__tabversion__,'LALR',signature,parser.action,parser.goto,productions):
+            pickle.dump(value,buffer,pickle.HIGHEST_PROTOCOL)
+        try:
+            WriteFileAtomic(picklefile,buffer.getvalue())
+        except (IOError,OSError) as e:
+            print("Warning: Unable to write parser table file '%s'. (%s)" % (picklefile,e))
+    return (parser.action,parser.goto,productions)
+
+def _ProductionTuple(p):
+    if p.func:
+        return (p.str,p.name,p.len,p.func,os.path.basename(p.file),p.line)
+    else:
+        return (str(p),p.name,p.len,None,None,None)
@@ -17,21 +17,14 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 import re
+import threading
 import ply.lex as lex
 # handles the evaluation of conditionals
 from .exprparser import ExpressionParser
 
-newtext   = []
-macros    = []
-bitBucket = False
-sentinel  = False
-
 preprocessor_tokens =  ['cond', 'else', 'endif', 'include', 'define', 'undef', 'line', 'error', 'pragma', 'warning']
 tokens = preprocessor_tokens + ['anyline']
 
-values = {}
-evaluate = ExpressionParser ().parse
-
 # Completely ignored characters
 t_ANY_ignore           = ' \t\x0c'
 
@@ -54,7 +47,7 @@ def t_cond (t):
     r'\#\s*(?P<ifType>ifdef\s|ifndef\s|if\s|elif\s)\s*(?P<cond>.*?)\n'
 
     # All conditionals that perform a test are handled here
-    global newtext
+    pp = t.lexer.preprocessor
     ifType = t.lexer.lexmatch.group ('ifType').strip ()
     condition, comment  = stripComment (t.lexer.lexmatch.group ('cond'))
     
@@ -66,80 +59,74 @@ def t_cond (t):
     else:
         mode = 'def'
 
-    ifCondition = evaluate (condition, mode, values)
+    ifCondition = pp.evaluate (condition, mode, pp.values)
         
-    global bitBucket, sentinel
-    bitBucket = ((not ifCondition) and (ifType != 'ifndef')) or (ifCondition and (ifType == 'ifndef'))
+    pp.bitBucket = ((not ifCondition) and (ifType != 'ifndef')) or (ifCondition and (ifType == 'ifndef'))
     
     # remove #define <sentinel>?
-    sentinel = not bitBucket and ('_h' in condition or '_H' in condition)
+    pp.sentinel = not pp.bitBucket and ('_h' in condition or '_H' in condition)
 
     # A multiline comment could begin on a preprocessor line
     # that's being eliminated here
-    if bitBucket and comment:
-        newtext.append (comment + '\n')
+    if pp.bitBucket and comment:
+        pp.newtext.append (comment + '\n')
     else:
-        newtext.append ('\n')
+        pp.newtext.append ('\n')
 
     t.lexer.lineno += 1
     
 def t_else (t):
     r'\#\s*else(.*?)\n'  # comments?
-    global bitBucket, newtext
-    bitBucket = not bitBucket
+    pp = t.lexer.preprocessor
+    pp.bitBucket = not pp.bitBucket
     t.lexer.lineno += 1
-    newtext.append ('\n')
+    pp.newtext.append ('\n')
     
 def t_endif (t):
     r'\#\s*endif(.*?)\n'
-    global bitBucket, newtext
-    bitBucket = False
+    pp = t.lexer.preprocessor
+    pp.bitBucket = False
     t.lexer.lineno += 1
-    newtext.append ('\n')
+    pp.newtext.append ('\n')
 
 def t_include (t):
     r'\#\s*include.*?\n'
-    global newtext
     t.lexer.lineno += 1
-    newtext.append ('\n')
+    t.lexer.preprocessor.newtext.append ('\n')
     
 def t_line (t):
     r'\#\s*line.*?\n'
-    global newtext
     t.lexer.lineno += 1
-    newtext.append ('\n')
+    t.lexer.preprocessor.newtext.append ('\n')
 
 def t_error (t):    
     r'\#\s*error.*?\n'
-    global newtext
     t.lexer.lineno += 1
-    newtext.append ('\n')
+    t.lexer.preprocessor.newtext.append ('\n')
     
 def t_pragma (t):    
     r'\#\s*pragma.*?\n'
-    global newtext
     t.lexer.lineno += 1
-    newtext.append ('\n')
+    t.lexer.preprocessor.newtext.append ('\n')
     
 def t_warning (t):    
     r'\#\s*warning.*?\n'
-    global newtext
     t.lexer.lineno += 1
-    newtext.append ('\n')
+    t.lexer.preprocessor.newtext.append ('\n')
 
 def t_undef (t):
     r'\#\s*undef\s*(?P<item>.*?)\n'
-    global macros, values, newtext
+    pp = t.lexer.preprocessor
     item = t.lexer.lexmatch.group ('item').strip ()
-    if item in values:
-        macros = [macro for macro in macros if len(macro)==2 or macro[2] != item]
-        del values [item]
+    if item in pp.values:
+        pp.macros.undefine (item)
+        del pp.values [item]
     t.lexer.lineno += 1
-    newtext.append ('\n')
+    pp.newtext.append ('\n')
     
 def t_define (t):
     r'\#\s*define\s*(?P<first>[\S]+)\s*?(?P<second>[^\n]*?)\n'    
-    global sentinel, values, macros, newtext
+    pp = t.lexer.preprocessor
     a = t.lexer.lexmatch.group ('first')
     b = t.lexer.lexmatch.group ('second')
     
@@ -165,18 +152,18 @@ def t_define (t):
         b = b [pos + 1:]
     
     # remove #define <sentinel>
-    sentinel = sentinel and not b and ('_h' in a or '_H' in a)
+    sentinel = pp.sentinel and not b and ('_h' in a or '_H' in a)
     if not sentinel:
         if not b or '(' in a:
-            values [a] = ''
-            macros.insert (0, (re.compile (a), '', a))
+            pp.values [a] = ''
+            pp.macros.define (a, '')
         else:
-            values [a] = b
-            macros.insert (0, (re.compile (a), b.strip (), a))
+            pp.values [a] = b
+            pp.macros.define (a, b.strip ())
     
-    sentinel = False
+    pp.sentinel = False
             
-    newtext.append (newlines *'\n')
+    pp.newtext.append (newlines *'\n')
     t.lexer.lineno += 1
     
 def t_anyline (t):
@@ -188,24 +175,196 @@ def t_anyline (t):
     been #if'd out (bitBucket == True) is replaced by
     a single newline for each line removed.
     """
-    global sentinel, newtext
-    sentinel = False
-    if not bitBucket:
-        line = t.value
-        for m in macros:
-            line = m[0].sub(m[1], line)
-        newtext.append (line)
+    pp = t.lexer.preprocessor
+    pp.sentinel = False
+    if not pp.bitBucket:
+        line = pp.macros.substitute (t.value)
+        pp.newtext.append (line)
         t.lexer.lineno += line.count('\n')
     else:
         c = t.value.count('\n')
         for x in range(c):
-            newtext.append('\n')
+            pp.newtext.append('\n')
         t.lexer.lineno += c
 
 # this needs to be HERE - not above token definitions
 ppLexer = lex.lex (debug=0)
 
     
+def _isIdentifierMacro (pattern, replacement):
+    # A macro whose regex is a plain identifier can only ever match inside
+    # a run of word characters.
+    if not _identifierRegex.match (pattern.pattern) or (pattern.flags & ~re.UNICODE):
+        return False
+    try:
+        pattern.sub (replacement, pattern.pattern)
+    except re.error:
+        # Leave bad replacement strings to the regex pass so that the error
+        # shows up in the same way.
+        return False
+    return True
+
+_identifierRegex = re.compile (r'\w+\Z')
+
+class _IdentifierMacroPass(object):
+    """Apply a sequence of plain identifier macros in one pass
+    
+    A single alternation regex finds the words that contain any of the
+    macro names. Each such word is then run through the macros one after
+    the other, exactly like applying each macro's regex to the whole text
+    in turn. The result for each word is remembered.
+    """
+    def __init__ (self, macros):
+        self._macros = macros
+        names = sorted (set (pattern.pattern for pattern, replacement in macros), key=len, reverse=True)
+        self._regex = re.compile ('|'.join (names))
+        self._words = {}
+        
+    def _substituteWord (self, word):
+        result = self._words.get (word)
+        if result is None:
+            result = word
+            for pattern, replacement in self._macros:
+                result = pattern.sub (replacement, result)
+            self._words [word] = result
+        return result
+        
+    def substitute (self, text):
+        match = self._regex.search (text)
+        if match is None:
+            return text
+            
+        accu = []
+        pos = 0
+        while match is not None:
+            # Widen the match to the whole word around it.
+            start = match.start ()
+            while start > pos and _wordCharRegex.match (text, start - 1):
+                start -= 1
+            end = _wordRegex.match (text, match.end ()).end ()
+            accu.append (text [pos:start])
+            accu.append (self._substituteWord (text [start:end]))
+            pos = end
+            match = self._regex.search (text, pos)
+        accu.append (text [pos:])
+        return ''.join (accu)
+        
+_wordCharRegex = re.compile (r'\w')
+_wordRegex = re.compile (r'\w*')
+
+class _RegexMacroPass(object):
+    def __init__ (self, pattern, replacement):
+        self._pattern = pattern
+        self._replacement = replacement
+        
+    def substitute (self, text):
+        return self._pattern.sub (self._replacement, text)
+        
+def CompileMacroPasses (macros):
+    """Compile a list of (regex, replacement) macros into substitution passes
+    
+    Consecutive plain identifier macros are combined into a single pass.
+    Applying the passes in order gives the same result as applying each
+    macro in order.
+    """
+    passes = []
+    identifierMacros = []
+    for macro in macros:
+        pattern, replacement = macro[0], macro[1]
+        if _isIdentifierMacro (pattern, replacement):
+            identifierMacros.append ((pattern, replacement))
+        else:
+            if identifierMacros:
+                passes.append (_IdentifierMacroPass (identifierMacros))
+                identifierMacros = []
+            passes.append (_RegexMacroPass (pattern, replacement))
+    if identifierMacros:
+        passes.append (_IdentifierMacroPass (identifierMacros))
+    return passes
+    
+class MacroSubstitution(object):
+    """The #define macros in effect during preprocessing
+    
+    Macros defined in the text are applied first, the most recent first.
+    The global macros are applied last, so they override any local #defines.
+    The local macros are recompiled on the first substitution after a
+    #define or #undef, the global macros are compiled once.
+    """
+    def __init__ (self, globalPasses=[]):
+        self._localMacros = []
+        self._localPasses = []
+        self._globalPasses = globalPasses
+        
+    def define (self, name, replacement):
+        self._localMacros.insert (0, (re.compile (name), replacement, name))
+        self._localPasses = None
+        
+    def undefine (self, name):
+        self._localMacros = [macro for macro in self._localMacros if macro[2] != name]
+        self._localPasses = None
+        
+    def substitute (self, text):
+        if self._localPasses is None:
+            self._localPasses = CompileMacroPasses (self._localMacros)
+        for macroPass in self._localPasses:
+            text = macroPass.substitute (text)
+        for macroPass in self._globalPasses:
+            text = macroPass.substitute (text)
+        return text
+
+class Preprocessor(object):
+    """A C preprocessor for header files.
+    
+    All of the state of a preprocessor run lives in this object and its
+    own lexer, so separate Preprocessor objects can be used at the same time,
+    e.g. from different threads. A single object is not reentrant.
+    """
+    def __init__ (self):
+        self.lexer = ppLexer.clone ()
+        self.lexer.preprocessor = self
+        self.evaluate = ExpressionParser ().parse
+        
+        self.newtext   = []
+        self.macros    = MacroSubstitution ()
+        self.values    = {}
+        self.bitBucket = False
+        
+        # Compiled global macro lists, these usually stay the same between runs.
+        self._globalMacroCache = {}
+        self.sentinel  = False
+        
+    def preprocess (self, text, global_values={}, global_macros=[]):
+        """
+        Preprocess a C/C++ header file text
+        
+        See the module level preprocess() function for details.
+        """
+        self.newtext   = []
+        self.bitBucket = False
+        self.sentinel  = False
+        self.macros    = MacroSubstitution (self._compileGlobalMacros (global_macros))
+        self.values    = {}
+            
+        self.values.update (global_values)
+        if text[-1]!='\n':
+            text = text + '\n'
+        self.lexer.input (text)
+        self.lexer.lineno = 1
+        token = self.lexer.token()
+        #print(self.newtext)
+        #return "".join (fixDoc (self.newtext))
+        return "".join(self.newtext)
+        
+    def _compileGlobalMacros (self, global_macros):
+        key = tuple ((macro[0], macro[1]) for macro in global_macros)
+        passes = self._globalMacroCache.get (key)
+        if passes is None:
+            passes = CompileMacroPasses (key)
+            self._globalMacroCache [key] = passes
+        return passes
+
+_threadState = threading.local ()
+
 def preprocess (text, global_values={}, global_macros=[]):
     """
     Preprocess a C/C++ header file text
@@ -230,21 +389,14 @@ def preprocess (text, global_values={}, global_macros=[]):
                      back references.
     
     Returns the processed string.
+    
+    This uses a Preprocessor object private to the calling thread.
     """
-    global newtext, bitBucket, macros, values
-    newtext   = []
-    bitBucket = False
-    macros    = [] + global_macros
-    values    = {}
-        
-    values.update (global_values)
-    if text[-1]!='\n':
-        text = text + '\n'
-    ppLexer.input (text)
-    token = ppLexer.token()
-    #print(newtext)
-    #return "".join (fixDoc (newtext))
-    return "".join(newtext)
+    preprocessor = getattr (_threadState, 'preprocessor', None)
+    if preprocessor is None:
+        preprocessor = Preprocessor ()
+        _threadState.preprocessor = preprocessor
+    return preprocessor.preprocess (text, global_values, global_macros)
 
 def fixDoc (textList):
     doReplace = False
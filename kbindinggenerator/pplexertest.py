@@ -17,6 +17,8 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 import unittest
+import re
+import threading
 import pplexer
 
 class TestPpParser(unittest.TestCase):
@@ -78,6 +80,86 @@ public:
 
 """))
 
+    def testDefineIf(self):
+        text = pplexer.preprocess("""#define FOO_VERSION 3
+#ifdef FOO_VERSION
+int foo(FOO_VERSION);
+#else
+int bar();
+#endif
+""")
+        self.assertTrue("int foo(3);" in text)
+        self.assertFalse("bar" in text)
+        self.assertEqual(text.count('\n'),6)
+
+    def testSeparatePreprocessors(self):
+        # The state of one preprocessor must not leak into another.
+        pp1 = pplexer.Preprocessor()
+        pp2 = pplexer.Preprocessor()
+        self.assertTrue("int bar;" in pp1.preprocess("#define FOO bar\nint FOO;\n"))
+        self.assertTrue("int FOO;" in pp2.preprocess("int FOO;\n"))
+        self.assertTrue("int FOO;" in pp1.preprocess("int FOO;\n"))
+
+    def testThreads(self):
+        texts = ["""#define NAME%i name%i
+#ifdef NAME%i
+void NAME%i();
+#endif
+""" % (i,i,i,i) * 20 for i in range(8)]
+        expected = [pplexer.Preprocessor().preprocess(text) for text in texts]
+        results = [None] * len(texts)
+        def run(i):
+            pp = pplexer.Preprocessor()
+            for x in range(10):
+                results[i] = pp.preprocess(texts[i])
+        threads = [threading.Thread(target=run,args=(i,)) for i in range(len(texts))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results,expected)
+
+
+    def testMacroPasses(self):
+        # The compiled passes must match applying each macro in turn.
+        macros = [(re.compile("FOO"), "BAR"),
+                  (re.compile("BAR"), "BAZ_EXPORT"),
+                  (re.compile("Q_SLOTS"), re.escape("slots")),
+                  (re.compile(r"Q_DECLARE_FLAGS\((.*?),(.*?)\)",re.DOTALL), r"typedef QFlags<\2> \1;"),
+                  (re.compile("EXPORT"), ""),
+                  (re.compile("KDE_DEPRECATED"), re.escape("a b")),
+                  (re.compile("FOO_BAR"), "never")]
+        text = """class FOO FOO_BAR : public QObject {
+    Q_DECLARE_FLAGS(Options, Option)
+public Q_SLOTS:
+    KDE_DEPRECATED void FOOFOO(MY_FOO_X x, BAR_EXPORT y);
+};
+"""
+        expected = text
+        for pattern, replacement in macros:
+            expected = pattern.sub(replacement, expected)
+
+        result = text
+        for macroPass in pplexer.CompileMacroPasses(macros):
+            result = macroPass.substitute(result)
+        self.assertEqual(result,expected)
+
+    def testLocalMacroOrder(self):
+        globalMacros = [(re.compile("Q_SIGNALS"), "signals")]
+        text = pplexer.Preprocessor().preprocess("""#define FOO_EXPORT
+#define BAR FOO
+#define FOO Q_SIGNALS
+#define BAZ qux
+#undef BAZ
+class FOO_EXPORT Foo {
+public BAR:
+    void BAZ();
+};
+""", {}, globalMacros)
+        self.assertTrue("class signals_EXPORT Foo {" in text)
+        self.assertTrue("public FOO:" in text)
+        self.assertTrue("void BAZ();" in text)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import os
+import os.path
+import sys
+import re
+import time
+import json
+import cProfile
+import contextlib
+from .sealed import sealed
+from .cachedir import WriteFileAtomic
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def PeakRSS():
+    """Get the peak resident set size of this process in KiB, or None if unknown."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss//1024 if sys.platform=="darwin" else rss
+
+class Report(object):
+    """Timings and counters collected while generating one module.
+
+    Phases are timed with start() and stop(), or with phase(). If
+    $TWINE2_CPROFILE_DIR is set, each phase also runs under cProfile and the
+    stats are dumped to <module>-<phase>.prof in that directory.
+    """
+    @sealed
+    def __init__(self,module):
+        self._module = module
+        self._phases = []
+        self._files = []
+        self._counters = {}
+        self._current = None
+
+    def start(self,name):
+        """Start timing the named phase. It runs until stop() is called."""
+        profileDirectory = os.environ.get("TWINE2_CPROFILE_DIR")
+        profiler = cProfile.Profile() if profileDirectory else None
+        self._current = (name,profiler,profileDirectory,time.perf_counter(),time.process_time())
+        if profiler is not None:
+            profiler.enable()
+
+    def stop(self):
+        """Stop timing the current phase and record it."""
+        name,profiler,profileDirectory,startWall,startCpu = self._current
+        self._current = None
+        if profiler is not None:
+            profiler.disable()
+        self._phases.append( {"name": name, "wall": time.perf_counter()-startWall,
+            "cpu": time.process_time()-startCpu} )
+        if profiler is not None:
+            if not os.path.isdir(profileDirectory):
+                os.makedirs(profileDirectory)
+            profiler.dump_stats(os.path.join(profileDirectory,"%s-%s.prof" % (self._module,re.sub(r"\W+","_",name))))
+
+    @contextlib.contextmanager
+    def phase(self,name):
+        """Context manager which times the code inside it as the named phase."""
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def addFile(self,kind,filename,wall,cpu,tokens=None):
+        """Record the time taken to process one file.
+
+        Keyword arguments:
+        kind -- the kind of file, e.g. "header" or "sip".
+        tokens -- number of tokens read by the lexer, or None if not counted.
+        """
+        self._files.append( {"kind": kind, "filename": filename, "wall": wall, "cpu": cpu, "tokens": tokens} )
+
+    def tokenCount(self,kind):
+        """Get the total number of tokens counted for the given kind of file."""
+        return sum(entry["tokens"] or 0 for entry in self._files if entry["kind"]==kind)
+
+    def setCount(self,name,value):
+        """Set the named counter."""
+        self._counters[name] = value
+
+    def toDict(self):
+        """Get the report as a dict which can be written as JSON."""
+        return {"module": self._module,
+            "phases": list(self._phases),
+            "files": list(self._files),
+            "counters": dict(self._counters),
+            "peakRSS": PeakRSS()}
+
+    def write(self,filename):
+        """Write the report to a JSON file."""
+        WriteFileAtomic(filename,json.dumps(self.toDict(),indent=1,sort_keys=True))
+
+    def summary(self):
+        """Get a short text summary of the phase timings."""
+        lines = ["    %-28s %8.2fs wall %8.2fs cpu" % (phase["name"],phase["wall"],phase["cpu"]) for phase in self._phases]
+        for name in sorted(self._counters):
+            lines.append("    %-28s %8i" % (name,self._counters[name]))
+        return "\n".join(lines)
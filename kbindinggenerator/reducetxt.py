@@ -56,6 +56,34 @@ boldWordNL  =  ["@value", "@var", ]
 
 boldWord    =  ["@a", "\\a", "@p", "\\p", "@b", "\\b", "@em"]
 
+# Compiled forms of the tables above, used by Reduce.
+_deleteLineRe = re.compile("|".join(re.escape(word) for word in deleteLine))
+_deleteWordSet = frozenset(deleteWords)
+_boldWordSet = frozenset(boldWord)
+_boldWordNLSet = frozenset(boldWordNL)
+
+# Words which start a block, mapped to the HTML which replaces them and
+# the state which follows.
+_STATE_DL = 3
+_STATE_CODE = 4
+_STATE_LICENSES = 5
+_blockWords = {}
+for _words,_html,_state in [
+        (("@authors","\\authors"), '\n<dl compact><dt><b>Author(s):</b></dt><dd>', _STATE_DL),
+        (("@maintainers","\\maintainers"), '\n<dl compact><dt><b>Maintainer(s):</b></dt><dd>', _STATE_DL),
+        (("@licenses","\\licenses"), '\n<dl compact><dt><b>License(s):</b></dt><dd>', _STATE_LICENSES),
+        (("@return","\\return","@returns","\\returns"), '<dl class="return" compact><dt><b>Returns:</b></dt><dd>', _STATE_DL),
+        (("@see","\\see"), '<dl class="see" compact><dt><b>See also:</b></dt><dd>', _STATE_DL),
+        (("@since","\\since"), '<dl class="since" compact><dt><b>Since:</b></dt><dd>', _STATE_DL),
+        (("@note","\\note"), '<dl class="note" compact><dt><b>Note:</b></dt><dd>', _STATE_DL),
+        (("@internal","\\internal"), '<dl class="internal" compact><dt><b>Internal:</b></dt><dd>', _STATE_DL),
+        (("@deprecated","\\deprecated"), '<dl class="deprecated" compact><dt><b>Deprecated:</b></dt><dd>', _STATE_DL),
+        (("@obsolete","\\obsolete"), '<dl class="obsolete" compact><dt><b>Obsolete:</b></dt><dd>', _STATE_DL),
+        (("@warning","\\warning"), '<dl class="warning" compact><dt><b>Warning:</b></dt><dd>', _STATE_DL),
+        (("@code","\\code"), '<pre class="fragment">', _STATE_CODE) ]:
+    for _word in _words:
+        _blockWords[_word] = (_html,_state)
+
 def escapeHtml(s):
     return s.replace('&','&amp;').replace('<','&lt;').replace('>','&gt;')
 
@@ -83,9 +111,17 @@ def handleTags(x):
     
 class Reduce(object):
     def __init__ (self):
-        pass
+        # Comment text -> HTML. Inherited doc comments repeat a lot.
+        self._cache = {}
 
     def do_txt (self, txt):
+        result = self._cache.get(txt)
+        if result is None:
+            result = self._do_txt(txt)
+            self._cache[txt] = result
+        return result
+        
+    def _do_txt (self, txt):
         txt = txt.replace ('/**<', '')
         txt = txt.replace ('/**', '')
         txt = txt.replace ('*/', '')
@@ -101,19 +137,16 @@ class Reduce(object):
             return word
     
     def delete (self, line):
-        for word in deleteLine:
-            if word in line:
-                return True
-        return False            
+        return _deleteLineRe.search(line) is not None
     
     
     def fixDoc (self, txt):
         STATE_NORMAL = 0
         STATE_PARAM = 1
         STATE_PARAM_TRAILING = 2
-        STATE_DL = 3
-        STATE_CODE = 4
-        STATE_LICENSES = 5
+        STATE_DL = _STATE_DL
+        STATE_CODE = _STATE_CODE
+        STATE_LICENSES = _STATE_LICENSES
         STATE_NBULLET = 6
         STATE_NBULLET_TRAILING = 7
         STATE_SKIP = 8
@@ -122,7 +155,8 @@ class Reduce(object):
 
         txt = txt.replace ("::", ".")
         lines = txt.split ("\n")
-        doclines = [line for line in lines if not self.delete (line)]
+        deleteSearch = _deleteLineRe.search
+        doclines = [line for line in lines if deleteSearch (line) is None]
 
         for i in range (len (doclines)):
             if state==STATE_SKIP:
@@ -137,7 +171,7 @@ class Reduce(object):
                 if strippedline=="":
                     newdocline.append("</td></tr>")
                     state = STATE_PARAM_TRAILING
-                elif firstword not in boldWord and firstword!="@param" and \
+                elif firstword not in _boldWordSet and firstword!="@param" and \
                         (firstword.startswith('@') or firstword.startswith('\\')):
                     newdocline.append("</td></tr>")
                     newdocline.append("</table></dl>\n<p>")
@@ -152,7 +186,7 @@ class Reduce(object):
                 if strippedline=="":
                     newdocline.append("</li>")
                     state = STATE_NBULLET_TRAILING
-                elif firstword not in boldWord and firstword!="-#" and \
+                elif firstword not in _boldWordSet and firstword!="-#" and \
                         (firstword.startswith('@') or firstword.startswith('\\')):
                     newdocline.append("</li></ol>")
                     newdocline.append("\n<p>")
@@ -198,10 +232,10 @@ class Reduce(object):
                         if atFlag:
                             line.append ("@%s" % word)
                             atFlag = False
-                        elif word not in deleteWords:
+                        elif word not in _deleteWordSet:
                             line.append (word)
     
-                line = [self.replace (word) for word in line]
+                line = [replaceWord.get (word, word) for word in line]
                 j = 0
                 originallinelen = len(line)
                 while j < originallinelen:
@@ -211,53 +245,8 @@ class Reduce(object):
                         line [j] = '\n<dl class="author" compact><dt><b>Author:</b></dt><dd>'
                         line.append("</dd></dl>")
                         
-                    elif word=='@authors' or word=='\\authors':
-                        line [j] = '\n<dl compact><dt><b>Author(s):</b></dt><dd>'
-                        state = STATE_DL
-                        
-                    elif word=='@maintainers' or word=='\\maintainers':
-                        line [j] = '\n<dl compact><dt><b>Maintainer(s):</b></dt><dd>'
-                        state = STATE_DL
-                        
-                    elif word=='@licenses' or word=='\\licenses':
-                        line [j] = '\n<dl compact><dt><b>License(s):</b></dt><dd>'
-                        state = STATE_LICENSES
-                        
-                    elif word=='@return' or word=='\\return' or word=='@returns' or word=='\\returns':
-                        line [j] = '<dl class="return" compact><dt><b>Returns:</b></dt><dd>'
-                        state = STATE_DL
-                        
-                    elif word=='@see' or word=='\\see':
-                        line [j] = '<dl class="see" compact><dt><b>See also:</b></dt><dd>'
-                        state = STATE_DL
-                        
-                    elif word=='@since' or word=='\\since':
-                        line [j] = '<dl class="since" compact><dt><b>Since:</b></dt><dd>'
-                        state = STATE_DL
-                    
-                    elif word=='@note' or word=='\\note':
-                        line [j] = '<dl class="note" compact><dt><b>Note:</b></dt><dd>'
-                        state = STATE_DL
-                    
-                    elif word=='@internal' or word=='\\internal':
-                        line [j] = '<dl class="internal" compact><dt><b>Internal:</b></dt><dd>'
-                        state = STATE_DL
-                        
-                    elif word=='@deprecated' or word=='\\deprecated':
-                        line [j] = '<dl class="deprecated" compact><dt><b>Deprecated:</b></dt><dd>'
-                        state = STATE_DL
-                    
-                    elif word=='@obsolete' or word=='\\obsolete':
-                        line [j] = '<dl class="obsolete" compact><dt><b>Obsolete:</b></dt><dd>'
-                        state = STATE_DL
-                        
-                    elif word=='@warning' or word=='\\warning':
-                        line [j] = '<dl class="warning" compact><dt><b>Warning:</b></dt><dd>'
-                        state = STATE_DL
-                        
-                    elif word=='@code' or word=='\\code':
-                        line[j] = '<pre class="fragment">'
-                        state = STATE_CODE                    
+                    elif word in _blockWords:
+                        line [j],state = _blockWords [word]
 
                     elif word in rawReplaceWord:
                         line[j] = rawReplaceWord[word]
@@ -281,7 +270,7 @@ class Reduce(object):
                     elif j < len(line)-1:
                     
                         nextWord = line [j + 1]
-                        if word in boldWord:
+                        if word in _boldWordSet:
                             line [j] = ""
                             line [j + 1] = "<b>%s</b>" % escapeHtml(nextWord)
                             j += 1
@@ -297,7 +286,7 @@ class Reduce(object):
                             j += 1
                             state = STATE_PARAM
                             
-                        elif word in boldWordNL:
+                        elif word in _boldWordNLSet:
                             line [j] = ""
                             line [j + 1] = "\n<b>%s</b> -" % escapeHtml(nextWord)
                             j += 1
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import unittest
+import reducetxt
+
+class TestReduce(unittest.TestCase):
+
+    def setUp(self):
+        self.reducer = reducetxt.Reduce()
+
+    def testParams(self):
+        self.assertEqual(self.reducer.do_txt('/**\n* Sets the mode.\n*\n* @param mode the new mode\n* @param notify emit a signal\n* @return true if the mode was changed\n* @see mode() @since 4.2\n*/'),
+            '<p>Sets the mode.\n</p>\n<p>\n</p><dl compact><dt><b>Parameters:</b></dt><dd>\n<table border="0" cellspacing="2" cellpadding="0">\n<tr><td></td><td valign="top"><em>mode</em>&nbsp;</td><td> the new mode\n\n<tr><td></td><td valign="top"><em>notify</em>&nbsp;</td><td> emit a signal\n</td></tr> </table></dl>\n<p> <dl class="return" compact><dt><b>Returns:</b></dt><dd> true if the mode was changed\n</dd></dl> <dl class="see" compact><dt><b>See also:</b></dt><dd> mode() <dl class="since" compact><dt><b>Since:</b></dt><dd> 4.2\n</dd></dl>\n</p>')
+
+    def testListAndCode(self):
+        self.assertEqual(self.reducer.do_txt('/** List:\n* -# first @b item\n* -# second\n*\n* \\code\n* if (a < b) {}\n* \\endcode\n* @author Foo <foo@kde.org>\n* @ingroup kdecore\n*/'),
+            '<p>List:\n</p><ol type="1"><li> first <b>item</b>\n<li> second\n</li>\n</ol>\n<p> <pre class="fragment">\n if (a &lt; b) {}\n</pre>\n\n<dl class="author" compact><dt><b>Author:</b></dt><dd> Foo &lt;foo@kde.org&gt; </dd></dl>\n</p>')
+
+    def testRepeatedComment(self):
+        text = "/** Returns the @p name.\n* @deprecated use @ref title() */"
+        result = self.reducer.do_txt(text)
+        self.assertEqual(result,reducetxt.Reduce().do_txt(text))
+        self.assertTrue(self.reducer.do_txt(text) is result)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,8 +10,15 @@
 # the Free Software Foundation; either version 2 of the License, or        #
 # (at your option) any later version.                                      #
 ############################################################################
+import os
 import sys
 
+# Set TWINE2_SEALED=0 to make @sealed do nothing. Objects are then ordinary
+# instances of their classes, without the checks and their cost. The checks
+# are on by default and should stay on for the tests. Pickles written in
+# one mode load in the other.
+SEALED = os.environ.get("TWINE2_SEALED","1")!="0"
+
 def sealed(func):
     """Decorator to seal an object after initialisation
     
@@ -27,6 +34,9 @@ def sealed(func):
     >>> x = MySealedClass()
     >>> x.new_attribute_y = True   # <- Raises an AttributeError
     """
+    if not SEALED:
+        return func
+        
     def sealing_init(self, *args, **kw):
         func(self, *args, **kw)
         
@@ -37,18 +47,73 @@ def sealed(func):
                 if caller.f_locals['self'] is self:
                     return
 
-        # Only create the wedge class once.
-        if sealing_init.wedge_class is None:
-            class wedge_class(self.__class__):
-                def __setattr__(self,name,value):
-                    getattr(self,name)
-                    #if name not in self.__dict__:  
-                    #    raise AttributeError("No new attributes may be added to this object.")
-                    super(wedge_class,self).__setattr__(name,value)
-            sealing_init.wedge_class = wedge_class
-            sealing_init.wedge_class.__name__ = self.__class__.__name__+" @sealed"
         # Replace the class of self with a new one that has a modified __setattr__.
-        self.__class__ = sealing_init.wedge_class
+        self.__class__ = _wedgeClass(self.__class__)
         
-    sealing_init.wedge_class = None
     return sealing_init
+
+_wedgeClasses = {}
+
+def _wedgeClass(cls):
+    # Only create the wedge class once per sealed class.
+    wedge = _wedgeClasses.get(cls)
+    if wedge is None:
+        class wedge_class(cls):
+            # No __dict__ of its own, so that __class__ can be switched on
+            # instances of classes which use __slots__.
+            __slots__ = ()
+            
+            def __setattr__(self,name,value):
+                getattr(self,name)
+                #if name not in self.__dict__:  
+                #    raise AttributeError("No new attributes may be added to this object.")
+                super(wedge_class,self).__setattr__(name,value)
+                
+            def __reduce_ex__(self,protocol):
+                # The wedge class can't be found by name, pickle the object
+                # as an instance of the real class and seal it again on load.
+                # The state is in pickle's standard (dict, slots) form, so that
+                # it also loads when the checks are turned off.
+                return (_unpickleSealed, (cls,), _attributes(self))
+                
+            def __setstate__(self,state):
+                dictState,slotState = state
+                for name,value in (dictState or {}).items():
+                    object.__setattr__(self,name,value)
+                for name,value in (slotState or {}).items():
+                    object.__setattr__(self,name,value)
+        wedge_class.__name__ = cls.__name__+" @sealed"
+        wedge_class._sealedClass = cls
+        _wedgeClasses[cls] = wedge_class
+        wedge = wedge_class
+    return wedge
+
+def RealClass(cls):
+    """Get the class itself for a @sealed wedge class, any other class as it is."""
+    return cls.__dict__.get('_sealedClass',cls)
+
+_slotNames = {}
+
+def _attributes(obj):
+    # (__dict__ attributes, __slots__ attributes) tuple.
+    cls = obj.__class__
+    names = _slotNames.get(cls)
+    if names is None:
+        names = []
+        for klass in cls.__mro__:
+            slots = klass.__dict__.get('__slots__',())
+            for name in ((slots,) if isinstance(slots,str) else slots):
+                if name not in ('__dict__','__weakref__') and name not in names:
+                    names.append(name)
+        _slotNames[cls] = names
+    slotState = {}
+    for name in names:
+        if hasattr(obj,name):
+            slotState[name] = getattr(obj,name)
+    return (dict(getattr(obj,'__dict__',{})) or None, slotState or None)
+
+def _unpickleSealed(cls):
+    obj = object.__new__(cls)
+    if SEALED:
+        obj.__class__ = _wedgeClass(cls)
+    return obj
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import os
+import os.path
+import io
+import pickle
+import hashlib
+from .sealed import sealed
+import kbindinggenerator.sealed as sealedmodule
+import kbindinggenerator.sipsymboldata as sipsymboldata
+from .cachedir import CacheDirectory, WriteFileAtomic, SourceVersion, HashFile
+
+# Source files whose contents determine the shape of the cached symbol data.
+_VERSION_MODULES = ['sealed.py', 'cppsymboldata.py', 'sipsymboldata.py', 'siplexer.py', 'sipparser.py', 'toolkit.py']
+
+# Source files whose contents determine the token stream of a sip file. The
+# parser is included because its actions switch the lexer's states.
+_TOKEN_VERSION_MODULES = ['siplexer.py', 'sipparser.py']
+
+_parserVersion = None
+_tokenVersion = None
+
+def ParserVersion():
+    """Get a string identifying the sip parser and symbol data code.
+
+    Cache entries written by a different version of the code are ignored.
+    """
+    global _parserVersion
+    if _parserVersion is None:
+        _parserVersion = SourceVersion(_VERSION_MODULES)
+    return _parserVersion
+
+def TokenVersion():
+    """Get a string identifying the sip lexer code."""
+    global _tokenVersion
+    if _tokenVersion is None:
+        _tokenVersion = SourceVersion(_TOKEN_VERSION_MODULES)
+    return _tokenVersion
+
+class SipTokenCache(object):
+    """Cache of the token streams of sip texts.
+
+    The tokens of a text are stored on disk as a list of (type, value, lineno,
+    lexpos, end lineno) tuples, keyed on a hash of the lexer version and the
+    text itself. SipParser replays them instead of running the lexer, see
+    SipParser.tokenCache. This still works when the symbol data cache has been
+    thrown away because other code changed.
+    """
+    @sealed
+    def __init__(self,directory=None):
+        self._directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def directory(self):
+        if self._directory is None:
+            self._directory = CacheDirectory("siptokens")
+        elif not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+        return self._directory
+
+    def load(self,text):
+        """Get the token list for a text, or None if it is not in the cache."""
+        cacheFilename = self._cacheFilename(text)
+        tokens = None
+        if os.path.exists(cacheFilename):
+            try:
+                with open(cacheFilename,'rb') as fhandle:
+                    tokens = pickle.load(fhandle)
+            except Exception as e:
+                print("Warning: Ignoring unreadable sip token cache file '%s'. (%s)" % (cacheFilename,e))
+                tokens = None
+        if tokens is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return tokens
+
+    def store(self,text,tokens):
+        """Store the token list for a text."""
+        cacheFilename = self._cacheFilename(text)
+        try:
+            WriteFileAtomic(cacheFilename,pickle.dumps(tokens,pickle.HIGHEST_PROTOCOL))
+        except (IOError,OSError) as e:
+            print("Warning: Unable to write sip token cache file '%s'. (%s)" % (cacheFilename,e))
+
+    def _cacheFilename(self,text):
+        digest = hashlib.sha1()
+        digest.update(TokenVersion().encode('ascii'))
+        digest.update(text.encode('utf-8'))
+        return os.path.join(self.directory(),digest.hexdigest() + ".pickle")
+
+class SipImportCache(object):
+    """Cache of parsed imported sip files.
+
+    Parsed files are kept in memory and as pickled symbol data on disk. A disk
+    entry is keyed on the file name, module and parser version, and is used
+    while the file's mtime and size, or failing that the hash of its contents,
+    still match.
+
+    All cached scopes belong to the cache's own SymbolData object. They are
+    meant to be treated as read only and can be added to any number of other
+    SymbolData objects via `addScope()`.
+
+    Files which do have to be parsed again can still skip the lexer by
+    using tokenCache().
+    """
+    @sealed
+    def __init__(self,directory=None):
+        self._directory = directory
+        self._symbolData = sipsymboldata.SymbolData()
+        self._tokenCache = SipTokenCache(os.path.join(directory,"tokens") if directory is not None else None)
+        self._memory = {}
+        self.hits = 0
+        self.misses = 0
+
+    def symbolData(self):
+        return self._symbolData
+
+    def tokenCache(self):
+        """Get the SipTokenCache belonging to this cache."""
+        return self._tokenCache
+
+    def directory(self):
+        if self._directory is None:
+            self._directory = CacheDirectory("sip")
+        elif not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+        return self._directory
+
+    def load(self,sipFilename,module,parseFunction):
+        """Get the top level scope for a sip file.
+
+        Keyword arguments:
+        sipFilename -- the sip file to load.
+        module -- module name the file belongs to, the scope's module is set to this.
+        parseFunction -- called as parseFunction(symbolData,sipFilename,module) to parse
+            the file when it is not in the cache. It must return the new scope.
+        """
+        fullFilename = os.path.abspath(sipFilename)
+        key = (fullFilename,module)
+        stat = os.stat(fullFilename)
+        stamp = (stat.st_mtime_ns,stat.st_size)
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0]==stamp:
+                self.hits += 1
+                return entry[2]
+            self._symbolData.removeScope(entry[2])
+            del self._memory[key]
+
+        cacheFilename = self._cacheFilename(fullFilename,module)
+        contentHash = None
+        scope = None
+        if os.path.exists(cacheFilename):
+            try:
+                with open(cacheFilename,'rb') as fhandle:
+                    header = pickle.load(fhandle)
+                    if header['stamp']!=stamp:
+                        contentHash = HashFile(fullFilename)
+                    if header['stamp']==stamp or header['hash']==contentHash:
+                        scope = self._symbolData.loadScopes(fhandle)[0]
+            except Exception as e:
+                print("Warning: Ignoring unreadable sip cache file '%s'. (%s)" % (cacheFilename,e))
+                scope = None
+
+        if scope is not None:
+            self.hits += 1
+            contentHash = header['hash']
+        else:
+            self.misses += 1
+            scope = parseFunction(self._symbolData,sipFilename,module)
+            if contentHash is None:
+                contentHash = HashFile(fullFilename)
+            self._store(cacheFilename,stamp,contentHash,scope)
+
+        self._memory[key] = (stamp,contentHash,scope)
+        return scope
+
+    def _store(self,cacheFilename,stamp,contentHash,scope):
+        buffer = io.BytesIO()
+        pickle.dump({'stamp': stamp, 'hash': contentHash},buffer,pickle.HIGHEST_PROTOCOL)
+        self._symbolData.dumpScopes([scope],buffer)
+        try:
+            WriteFileAtomic(cacheFilename,buffer.getvalue())
+        except (IOError,OSError) as e:
+            print("Warning: Unable to write sip cache file '%s'. (%s)" % (cacheFilename,e))
+
+    def _cacheFilename(self,fullFilename,module):
+        digest = hashlib.sha1()
+        digest.update(ParserVersion().encode('ascii'))
+        # Runs with and without the @sealed checks keep separate files, so one
+        # mode doesn't overwrite what the other one wrote.
+        digest.update(repr(sealedmodule.SEALED).encode('ascii'))
+        digest.update(fullFilename.encode('utf-8'))
+        digest.update(repr(module).encode('utf-8'))
+        return os.path.join(self.directory(),os.path.basename(fullFilename) + "-" + digest.hexdigest() + ".pickle")
+
+_sharedCaches = {}
+
+def SharedSipImportCache(directory=None):
+    """Get the process wide SipImportCache for a cache directory."""
+    cache = _sharedCaches.get(directory)
+    if cache is None:
+        cache = SipImportCache(directory)
+        _sharedCaches[directory] = cache
+    return cache
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import unittest
+import io
+import os
+import os.path
+import shutil
+import tempfile
+import sipparser
+import sipsymboldata
+import sipcache
+import sealed
+
+SIP_TEXT = """
+%ModuleHeaderCode
+#include <foo.h>
+%End
+
+class Foo : QObject
+{
+public:
+    enum Mode { ModeA, ModeB };
+    Foo (QObject* parent /TransferThis/ = 0);
+    int bar (Foo::Mode mode = Foo::ModeA) const;
+signals:
+    void changed ();
+protected:
+    virtual void baz ();
+};
+"""
+
+class TestSymbolDataPickle(unittest.TestCase):
+    def testRoundTrip(self):
+        parser = sipparser.SipParser()
+        syms = sipsymboldata.SymbolData()
+        scope = parser.parse(syms,SIP_TEXT)
+
+        buffer = io.BytesIO()
+        syms.dumpScopes([scope],buffer)
+        buffer.seek(0)
+
+        newSyms = sipsymboldata.SymbolData()
+        newScope = newSyms.loadScopes(buffer)[0]
+        self.assertEqual(newScope.format(),scope.format())
+        self.assertTrue(newScope._symbolData() is newSyms)
+
+        fooClass = newSyms.lookupType("Foo",newScope)
+        self.assertTrue(isinstance(fooClass,sipsymboldata.SymbolData.SipClass))
+        self.assertTrue(fooClass[-2].access() is newSyms.ACCESS_SIGNALS)
+        if sealed.SEALED:
+            self.assertRaises(AttributeError,setattr,fooClass,"_noSuchAttribute",1)
+
+    def testLoadUnsealed(self):
+        # Pickles written with the @sealed checks on load with them off.
+        parser = sipparser.SipParser()
+        syms = sipsymboldata.SymbolData()
+        scope = parser.parse(syms,SIP_TEXT)
+        buffer = io.BytesIO()
+        syms.dumpScopes([scope],buffer)
+        buffer.seek(0)
+
+        oldSealed = sealed.SEALED
+        sealed.SEALED = False
+        try:
+            newSyms = sipsymboldata.SymbolData()
+            newScope = newSyms.loadScopes(buffer)[0]
+        finally:
+            sealed.SEALED = oldSealed
+        self.assertEqual(newScope.format(),scope.format())
+        fooClass = newSyms.lookupType("Foo",newScope)
+        self.assertTrue(type(fooClass) is sipsymboldata.SymbolData.SipClass)
+        self.assertTrue(type(fooClass[-2]) is sipsymboldata.SymbolData.Function)
+
+class TestSipImportCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.sipFilename = os.path.join(self.tmpdir,"foo.sip")
+        with open(self.sipFilename,'w') as fhandle:
+            fhandle.write(SIP_TEXT)
+        self.parseCount = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def parse(self,symbolData,sipFilename,module):
+        self.parseCount += 1
+        with open(sipFilename) as fhandle:
+            scope = sipparser.SipParser().parse(symbolData,fhandle.read(),filename=sipFilename)
+        scope.setModule(module)
+        return scope
+
+    def testMemoryCache(self):
+        cache = sipcache.SipImportCache(os.path.join(self.tmpdir,"cache"))
+        scope = cache.load(self.sipFilename,"foomod",self.parse)
+        self.assertTrue(cache.load(self.sipFilename,"foomod",self.parse) is scope)
+        self.assertEqual(self.parseCount,1)
+
+    def testDiskCache(self):
+        cacheDir = os.path.join(self.tmpdir,"cache")
+        scope = sipcache.SipImportCache(cacheDir).load(self.sipFilename,"foomod",self.parse)
+
+        cache = sipcache.SipImportCache(cacheDir)
+        cachedScope = cache.load(self.sipFilename,"foomod",self.parse)
+        self.assertEqual(self.parseCount,1)
+        self.assertEqual(cachedScope.format(),scope.format())
+        self.assertEqual(cachedScope.module(),"foomod")
+        self.assertTrue(cachedScope._symbolData() is cache.symbolData())
+
+    def testChangedFile(self):
+        cacheDir = os.path.join(self.tmpdir,"cache")
+        sipcache.SipImportCache(cacheDir).load(self.sipFilename,"foomod",self.parse)
+        with open(self.sipFilename,'w') as fhandle:
+            fhandle.write(SIP_TEXT.replace("baz","qux"))
+
+        scope = sipcache.SipImportCache(cacheDir).load(self.sipFilename,"foomod",self.parse)
+        self.assertEqual(self.parseCount,2)
+        self.assertTrue("qux" in scope.format())
+
+    def testTouchedFile(self):
+        cacheDir = os.path.join(self.tmpdir,"cache")
+        sipcache.SipImportCache(cacheDir).load(self.sipFilename,"foomod",self.parse)
+        stat = os.stat(self.sipFilename)
+        os.utime(self.sipFilename,(stat.st_atime+10,stat.st_mtime+10))
+
+        sipcache.SipImportCache(cacheDir).load(self.sipFilename,"foomod",self.parse)
+        self.assertEqual(self.parseCount,1)
+
+    def testSealedModes(self):
+        cacheDir = os.path.join(self.tmpdir,"cache")
+        sipcache.SipImportCache(cacheDir).load(self.sipFilename,"foomod",self.parse)
+
+        # The other mode has a cache file of its own.
+        oldSealed = sealed.SEALED
+        sealed.SEALED = not oldSealed
+        try:
+            cache = sipcache.SipImportCache(cacheDir)
+            cache.load(self.sipFilename,"foomod",self.parse)
+        finally:
+            sealed.SEALED = oldSealed
+        self.assertEqual(self.parseCount,2)
+        self.assertEqual(cache.misses,1)
+
+        cache = sipcache.SipImportCache(cacheDir)
+        scope = cache.load(self.sipFilename,"foomod",self.parse)
+        self.assertEqual(self.parseCount,2)
+        if sealed.SEALED:
+            self.assertRaises(AttributeError,setattr,scope[-1],"_noSuchAttribute",1)
+
+class TestSipTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def parse(self,cache):
+        parser = sipparser.SipParser()
+        parser.tokenCache = cache
+        parser.countTokens = True
+        scope = parser.parse(sipsymboldata.SymbolData(),SIP_TEXT)
+        return scope,parser.tokenCount
+
+    def testReplay(self):
+        cache = sipcache.SipTokenCache(self.tmpdir)
+        scope,tokenCount = self.parse(cache)
+        self.assertEqual(cache.misses,1)
+
+        lexToken = sipparser.sipLexer.token
+        sipparser.sipLexer.token = None
+        try:
+            cachedScope,cachedTokenCount = self.parse(cache)
+        finally:
+            sipparser.sipLexer.token = lexToken
+        self.assertEqual(cache.hits,1)
+        self.assertEqual(cachedTokenCount,tokenCount)
+        self.assertEqual(cachedScope.format(),scope.format())
+
+        self.assertEqual([item.sourceLocation() for item in cachedScope[-1]],
+            [item.sourceLocation() for item in scope[-1]])
+
+    def testChangedText(self):
+        cache = sipcache.SipTokenCache(self.tmpdir)
+        self.parse(cache)
+        self.assertEqual(cache.load(SIP_TEXT.replace("baz","qux")),None)
+        self.assertEqual(cache.misses,2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -79,6 +79,25 @@ operators = ('PLUS', 'MINUS', 'SLASH', 'PERCENT', 'VBAR', 'CARET', #'LSHIFT', 'R
     'ANDEQUAL', 'XOREQUAL', 'OREQUAL'
 )
 
+# Identifier -> (token type, state to begin or None, only after a '%') for
+# t_ID(). The first group an identifier is in decides its type.
+_directiveStates = {'Import': 'filename', 'OptionalInclude': 'filename', 'Module': 'keypairs',
+    'API': 'keypairs', 'Include': 'keypairs', 'DefaultEncoding': 'string',
+    'DefaultMetatype': 'dottedname', 'DefaultSupertype': 'dottedname'}
+_idTypes = {}
+for names,tokenType,percent in ((edges,None,False), (cppScalarTypes,None,False), (accessSpecifiers,None,False),
+        (storageQualifiers,"STORAGE",False), (functionQualifiers,None,False), (cvQualifiers,"CVQUAL",False),
+        (blockTokens,'BLOCK',False), (stmtTokens,'SIPSTMT',True), (sipDirectives,None,True), (('throw',),None,False)):
+    for name in names:
+        if tokenType=='BLOCK':
+            state = 'block'
+        elif tokenType=='SIPSTMT':
+            state = 'sipStmt'
+        else:
+            state = _directiveStates.get(name) if percent else None
+        _idTypes.setdefault(name,(tokenType or name,state,percent))
+del names,tokenType,percent,name,state
+
 cppTokens = edges + cppScalarTypes + functionQualifiers + operators + accessSpecifiers
 
 tokens = cppTokens + sipDirectives + (
@@ -332,42 +351,16 @@ def t_SIP_SLOT_DIS (t):
 
 def t_ID(t):
     r'[A-Za-z_][\w_.]*'
-    if t.value in edges:
-        t.type = t.value
-    elif t.value in cppScalarTypes:
-        t.type = t.value
-    elif t.value in accessSpecifiers:
-        t.type = t.value
-    elif t.value in storageQualifiers:
-        t.type = "STORAGE"
-    elif t.value in functionQualifiers:
-        t.type = t.value
-        if t.value == 'virtual' and stateInfo:
+    idType = _idTypes.get(t.value)
+    if idType is not None:
+        tokenType,state,percent = idType
+        if percent and t.lexer.lexdata[t.lexer.lexpos - len(t.value) - 1]!='%':
+            return t
+        t.type = tokenType
+        if state is not None:
+            t.lexer.begin(state)
+        elif tokenType=='virtual' and stateInfo:
             stateInfo.virtual = True
-    elif t.value in cvQualifiers:
-        t.type = "CVQUAL"
-    elif t.value in blockTokens:
-        t.type = 'BLOCK'
-        t.lexer.begin ('block')
-    elif t.value in stmtTokens:
-        pos = t.lexer.lexpos - len (t.value) - 1
-        if t.lexer.lexdata [pos] == '%':
-            t.type = 'SIPSTMT'
-            t.lexer.begin ('sipStmt')        
-    elif t.value in sipDirectives:
-        pos = t.lexer.lexpos - len (t.value) - 1
-        if t.lexer.lexdata [pos] == '%':
-            if t.value in ['Import', 'OptionalInclude']:
-                t.lexer.begin('filename')
-            elif t.value in ['Module','API', 'Include']:
-                t.lexer.begin('keypairs')
-            elif t.value=='DefaultEncoding':
-                t.lexer.begin('string')
-            elif t.value in ['DefaultMetatype','DefaultSupertype']:
-                t.lexer.begin('dottedname')
-            t.type = t.value
-    elif t.value == 'throw':
-        t.type = t.value
     return t
 
 # Capture inline documentation
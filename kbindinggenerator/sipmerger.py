@@ -145,17 +145,14 @@ def _MergeSipFunction(sipsym,primaryFunction,updateFunction):
     primaryFunction.setArguments(newArguments)
 
 def _MangleFunctionName(sipsym,function):
+    # A key for the function signature. Type refs are interned, so the
+    # argument types can be compared without building strings.
     name = function.name()
     if isinstance(function,sipsym.Destructor):
         name = "~" + name
 
-    name = name + '(' + \
-        ','.join([arg.argumentType() for arg in function.arguments() if arg.defaultValue() is None]) + ')'
-
-    if 'const' in function._qualifier:
-        name = name + " const"
-        
-    return name
+    return (name, tuple(arg.typeRef() for arg in function.arguments() if arg.defaultValue() is None),
+        'const' in function._qualifier)
 
 def _MergeArgument(sipsym,primaryArgument,updateArgument):
     resultArg = sipsym.Argument(primaryArgument.argumentType(),
@@ -18,9 +18,11 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 import sys
+import ply.lex as lex
 from .sealed import sealed
-import ply.yacc as yacc
+from .plytables import BuildParser
 from .siplexer import sipLexer, tokens
+from . import siplexer
 
 def joinp(p, startindex, string=" "):
     tmplist = []
@@ -42,8 +44,15 @@ class SipParser(object):
         self._resetState()
 
         self.tokens = tokens        
-        yacc.yacc(module = self, tabmodule = "sipParserTab")
-        self._parse = yacc.parse 
+        self._parse = BuildParser(self, "sipParserTab").parse
+        # Set countTokens to count the tokens read into tokenCount.
+        self.countTokens = False
+        self.tokenCount = 0
+        # Set tokenCache to a sipcache.SipTokenCache to replay the tokens of
+        # texts which have been lexed before.
+        self.tokenCache = None
+        self._replayTokens = None
+        self._recordedTokens = None
         
     def _resetState(self):
         self._scopeStack = []
@@ -103,11 +112,52 @@ class SipParser(object):
         sipLexer.input (text)
         sipLexer.lineno = 1
         sipLexer.lexpos = 0
-    
-        result = self._parse(debug = debugLevel, lexer = self.lexer)
+        # Start every text in the same state, so that its tokens only depend on the text.
+        sipLexer.begin('variable')
+
+        # The lexer's doc comment hooks don't run when tokens are replayed.
+        if self.tokenCache is not None and siplexer.stateInfo is None:
+            tokenList = self.tokenCache.load(text)
+            if tokenList is not None:
+                self._replayTokens = iter(tokenList)
+            else:
+                self._recordedTokens = []
+
+        try:
+            if self.countTokens or self._replayTokens is not None or self._recordedTokens is not None:
+                result = self._parse(debug = debugLevel, lexer = self.lexer, tokenfunc = self._nextToken)
+            else:
+                result = self._parse(debug = debugLevel, lexer = self.lexer)
+            if self._recordedTokens is not None:
+                self.tokenCache.store(text,self._recordedTokens)
+        finally:
+            self._replayTokens = None
+            self._recordedTokens = None
         # FIXME topScope should equal self.scope now. But there is a bug in the template parsing somewhere.
         return topScope
         
+    def _nextToken(self):
+        if self._replayTokens is not None:
+            tokenType,value,lineno,lexpos,endLineno = next(self._replayTokens,(None,None,None,None,self.lexer.lineno))
+            # Parser actions read the line number from the lexer.
+            self.lexer.lineno = endLineno
+            if tokenType is None:
+                return None
+            token = lex.LexToken()
+            token.type,token.value,token.lineno,token.lexpos = tokenType,value,lineno,lexpos
+            token.lexer = self.lexer
+        else:
+            token = self.lexer.token()
+            if self._recordedTokens is not None:
+                # The end of the input is recorded too, for its line number.
+                if token is not None:
+                    self._recordedTokens.append( (token.type,token.value,token.lineno,token.lexpos,self.lexer.lineno) )
+                else:
+                    self._recordedTokens.append( (None,None,None,None,self.lexer.lineno) )
+        if token is not None and self.countTokens:
+            self.tokenCount += 1
+        return token
+        
     def _pushScope(self, newScope):
         self._scopeStack.append(self.scope)
         self.scope = newScope
@@ -17,35 +17,51 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 from .sealed import sealed
 # from argvalidate import accepts,returns,one_of
+import sys
 import types
 import kbindinggenerator.cppsymboldata as cppsymboldata
 
+# Attributes of _SipEntityExtra. The mixin can't hold slots itself because it
+# is combined with the slotted C++ entity classes, so every class using it
+# lists these.
+_SIP_ENTITY_SLOTS = ('_annotations', '_blocks', '_ignore', '_cppargs', '_cppreturn', '_force', '_fqPythonNameCache')
+
 class SymbolData(cppsymboldata.SymbolData):
     @sealed
     def __init__(self):
         cppsymboldata.SymbolData.__init__(self)
         
     class _SipEntityExtra(object):
+        __slots__ = ()
         @sealed
         def __init__(self):
-            self._annotations = []
-            self._blocks = []
+            self._annotations = ()
+            self._blocks = ()
             self._ignore = False
             self._cppargs = None
             self._cppreturn = None
             self._force = False
+            self._fqPythonNameCache = None
             
         # @returns(str)
         def fqPythonName(self):
+            if self._fqPythonNameCache is not None:
+                return self._fqPythonNameCache
+                
             parentFqn = self.parentScope().fqPythonName()
             
             if self.name() is None:
                 return ""
             
             if parentFqn is not None:
-                return parentFqn + "." + self.name()
+                self._fqPythonNameCache = sys.intern(parentFqn + "." + self.name())
             else:
-                return self.name()
+                self._fqPythonNameCache = sys.intern(self.name())
+            return self._fqPythonNameCache
+            
+        def _invalidateNames(self):
+            cppsymboldata.SymbolData.Entity._invalidateNames(self)
+            self._fqPythonNameCache = None
                 
         def ignore(self):
             return self._ignore
@@ -60,7 +76,8 @@ class SymbolData(cppsymboldata.SymbolData):
             return self._force
             
         def setAnnotations(self,annotations):
-            self._annotations = annotations
+            # Share one empty tuple instead of keeping the parser's empty lists.
+            self._annotations = annotations or ()
             
         def annotations(self):
             return self._annotations
@@ -72,6 +89,8 @@ class SymbolData(cppsymboldata.SymbolData):
             self._cppreturn = cppreturn
             
         def addBlock(self, block):
+            if not self._blocks:
+                self._blocks = []
             self._blocks.append(block)
             
         def blocks(self):
@@ -94,6 +113,7 @@ class SymbolData(cppsymboldata.SymbolData):
                 return ""
                 
     class TopLevelScope(cppsymboldata.SymbolData.TopLevelScope):
+        __slots__ = ('_module',)
         @sealed
         def __init__(self,symbolData):
             cppsymboldata.SymbolData.TopLevelScope.__init__(self,symbolData)
@@ -126,6 +146,7 @@ class SymbolData(cppsymboldata.SymbolData):
             return None
 
     class SipClass(_SipEntityExtra, cppsymboldata.SymbolData.CppClass):
+        __slots__ = _SIP_ENTITY_SLOTS
         @sealed
         def __init__(self,parentScope, name, filename=None, lineno=-1):
             cppsymboldata.SymbolData.CppClass.__init__(self, parentScope, name, filename, lineno)
@@ -213,15 +234,16 @@ class SymbolData(cppsymboldata.SymbolData):
             return "<SipClass '%s'>" % (self.name(),)
 
     class Argument(cppsymboldata.SymbolData.Argument):
+        __slots__ = ('_annotations',)
         # FIXME Make this immutable.
     
         @sealed
         def __init__(self, argumentType, argumentName = None, argumentValue = None, template = None, defaultTypes = None):
             cppsymboldata.SymbolData.Argument.__init__(self, argumentType, argumentName, argumentValue, template, defaultTypes)
-            self._annotations = []
+            self._annotations = ()
 
         def setAnnotations(self,annotations):
-            self._annotations = annotations
+            self._annotations = annotations or ()
             
         def annotations(self):
             return self._annotations
@@ -235,6 +257,7 @@ class SymbolData(cppsymboldata.SymbolData):
                 ("" if self._defaultValue is None else " = "+self._defaultValue)
 
     class FunctionArgument(Argument):
+        __slots__ = ('_returnType', '_functionArguments')
         @sealed
         def __init__(self, argumentName, returnType, functionArguments):
             SymbolData.Argument.__init__(self,None, argumentName)
@@ -245,6 +268,7 @@ class SymbolData(cppsymboldata.SymbolData):
             return self._returnType + " (*" + self._argumentName + ")("+self._functionArguments+")"
 
     class Function(_SipEntityExtra, cppsymboldata.SymbolData.Function):
+        __slots__ = _SIP_ENTITY_SLOTS
         @sealed
         def __init__(self, parentScope, name, filename=None, lineno=-1):
             cppsymboldata.SymbolData.Function.__init__(self,parentScope,name,filename,lineno)
@@ -269,6 +293,7 @@ class SymbolData(cppsymboldata.SymbolData):
 
 
     class Constructor(_SipEntityExtra, cppsymboldata.SymbolData.Constructor):
+        __slots__ = _SIP_ENTITY_SLOTS
         @sealed
         def __init__(self, parentScope, name, filename=None, lineno=-1):
             cppsymboldata.SymbolData.Constructor.__init__(self,parentScope,name,filename,lineno)
@@ -284,6 +309,7 @@ class SymbolData(cppsymboldata.SymbolData):
                 ''.join( (block.format(indent) for block in self._blocks))
 
     class Destructor(_SipEntityExtra, cppsymboldata.SymbolData.Destructor):
+        __slots__ = _SIP_ENTITY_SLOTS
         @sealed
         def __init__(self, parentScope, name, filename=None, lineno=-1):
             cppsymboldata.SymbolData.Destructor.__init__(self,parentScope,name,filename,lineno)
@@ -299,6 +325,7 @@ class SymbolData(cppsymboldata.SymbolData):
                 ''.join( (block.format(indent) for block in self._blocks))
             
     class Variable(_SipEntityExtra, cppsymboldata.SymbolData.Variable):
+        __slots__ = _SIP_ENTITY_SLOTS
         @sealed
         def __init__(self, parentScope, name, filename=None, lineno=-1):
             cppsymboldata.SymbolData.Variable.__init__(self,parentScope,name,filename,lineno)
@@ -347,11 +374,13 @@ class SymbolData(cppsymboldata.SymbolData):
             return SymbolData.SipBlock.format(self,indent)
         
     class Comment(cppsymboldata.SymbolData.Comment):
+        __slots__ = ()
         @sealed
         def __init__(self, parentScope, filename=None, lineno=-1):
             cppsymboldata.SymbolData.Comment.__init__(self, parentScope, filename, lineno)
 
     class Template(_SipEntityExtra, cppsymboldata.SymbolData._CppEntity):
+        __slots__ = _SIP_ENTITY_SLOTS + ('_parameters',)
         @sealed
         def __init__(self, parentScope, filename, lineno):
             cppsymboldata.SymbolData._CppEntity.__init__(self, parentScope, None, filename, lineno)
@@ -379,6 +408,7 @@ class SymbolData(cppsymboldata.SymbolData):
             return SymbolData.SipBlock.format(self,indent)
 
     class Enum(_SipEntityExtra, cppsymboldata.SymbolData.Enum):
+        __slots__ = _SIP_ENTITY_SLOTS
         @sealed
         # @accepts(cppsymboldata.SymbolData.Entity,one_of(str,types.NoneType),filename=one_of(str,types.NoneType),lineno=int)
         def __init__(self, parentScope, name, filename=None, lineno=-1):
@@ -415,6 +445,7 @@ class SymbolData(cppsymboldata.SymbolData):
             return ''.join(accu)
         
     class Enumerator(cppsymboldata.SymbolData.Enumerator):
+        __slots__ = ()
         @sealed
         def __init__(self,name,value):
             cppsymboldata.SymbolData.Enumerator.__init__(self,name,value)
@@ -423,6 +454,7 @@ class SymbolData(cppsymboldata.SymbolData):
             return self._name
                 
     class EnumeratorComment(object):
+        __slots__ = ('_body',)
         @sealed
         def __init__(self,body):
             self._body = body
@@ -431,6 +463,7 @@ class SymbolData(cppsymboldata.SymbolData):
             return self._body
 
     class Typedef(_SipEntityExtra, cppsymboldata.SymbolData.Typedef):
+        __slots__ = _SIP_ENTITY_SLOTS
         @sealed
         def __init__(self,parentScope, name, filename=None, lineno=-1):
             cppsymboldata.SymbolData.Typedef.__init__(self,parentScope, name, filename, lineno)
@@ -448,6 +481,7 @@ class SymbolData(cppsymboldata.SymbolData):
             return self._formatIgnore(indent) + cppsymboldata.SymbolData.Typedef.format(self,indent)
             
     class FunctionPointerTypedef(Typedef):
+        __slots__ = ('_functionArgument',)
         @sealed
         def __init__(self,parentScope, functionArgument, filename, lineno):
             SymbolData.Typedef.__init__(self,parentScope, functionArgument.name(), filename, lineno)
@@ -458,6 +492,7 @@ class SymbolData(cppsymboldata.SymbolData):
             return self._formatIgnore(indent) + pre + "typedef "+ self._functionArgument.format() + ";\n"
             
     class Namespace(_SipEntityExtra, cppsymboldata.SymbolData.Namespace):
+        __slots__ = _SIP_ENTITY_SLOTS
         @sealed
         def __init__(self, parentScope, name, filename=None, lineno=-1):
             cppsymboldata.SymbolData.Namespace.__init__(self, parentScope, name, filename, lineno)
@@ -18,7 +18,7 @@
 
 #from argvalidate import accepts,returns,one_of
 import types
-from .sealed import sealed
+from .sealed import sealed, RealClass
 import kbindinggenerator.cmake as cmake
 import kbindinggenerator.cpplexer as cpplexer
 import kbindinggenerator.cppparser as cppparser
@@ -27,10 +27,21 @@ import kbindinggenerator.sipparser as sipparser
 import kbindinggenerator.sipsymboldata as sipsymboldata
 import kbindinggenerator.cpptosiptransformer as cpptosiptransformer
 import kbindinggenerator.sipmerger as sipmerger
+import kbindinggenerator.sipcache as sipcache
+import kbindinggenerator.profiling as profiling
+import kbindinggenerator.typeref as typeref
 import os
 import os.path
 import glob
+import io
+import re
+import json
+import hashlib
+import contextlib
+import multiprocessing
+import time
 from .reducetxt import Reduce
+from .cachedir import SourceVersion, HashFile, WriteFileIfChanged
 
 
 def cmp(a, b):
@@ -44,7 +55,8 @@ class ModuleGenerator(object):
             preprocessorValues=[],preprocessSubstitutionMacros=[],macros=[],bareMacros=[],exportMacros=None,
             ignoreBases=None,noCTSCC=[],sipImportDirs=[],sipImports=[],copyrightNotice=None,
             annotationRules=[],docsOutputDirectory=None,mainDocs=None,filenameMappingFunction=None,
-            cppHeaderMappingFunction=None):
+            cppHeaderMappingFunction=None,useSipCache=True,sipCacheDirectory=None,
+            jobs=1,incremental=False,profile=False):
             
         self._module = module
         self._cmakelists = [cmakelists] if (isinstance(cmakelists,str) or isinstance(cmakelists,unicode)) else cmakelists
@@ -68,8 +80,18 @@ class ModuleGenerator(object):
         self._cppParser.bareMacros = self._bareMacros
         self._cppParser.macros = self._macros
         self._cppParser.preprocessorSubstitutionMacros = self._preprocessSubstitutionMacros
+        self._cppParser.countTokens = profile
         
         self._cppScopeList = []
+        self._jobs = jobs
+        self._incremental = incremental
+        self._writeCounts = [0,0]
+        self._importedSipFilenames = []
+        
+        # Anything here that changes means that all headers have to be converted again.
+        self._configHash = _Fingerprint( (module, preprocessorValues, preprocessSubstitutionMacros, macros, bareMacros,
+            exportMacros, ignoreBases, noCTSCC, noUpdateSip, sipImports, copyrightNotice, annotationRules,
+            filenameMappingFunction, cppHeaderMappingFunction, _GeneratorVersion()) )
 
         self._transformer = cpptosiptransformer.CppToSipTransformer()
         self._transformer.setExportMacros(exportMacros)
@@ -83,7 +105,10 @@ class ModuleGenerator(object):
         self._sipImports = sipImports
         
         self._sipParser = sipparser.SipParser()
+        self._sipParser.countTokens = profile
         self._sipSymbolData = sipsymboldata.SymbolData()
+        # Imported sip files are parsed once and shared between generators.
+        self._sipImportCache = sipcache.SharedSipImportCache(sipCacheDirectory) if useSipCache else None
         
         self._annotator = cpptosiptransformer.SipAnnotator()
         self._annotator.setMethodAnnotationRules(annotationRules)
@@ -91,7 +116,39 @@ class ModuleGenerator(object):
         self._docsOutputDirectory = docsOutputDirectory
         self._mainDocs = mainDocs
         
+        # Parse results kept for docs(). Maps header file names to their Cpp
+        # scopes, and holds the module's sip scopes once they are final.
+        self._cppHeaderScopes = {}
+        self._moduleSipScopes = None
+        self._docsWriteCounts = [0,0]
+        # linkType() results for the current docs() run, with hit and miss counts.
+        self._linkTypeCache = {}
+        self._linkTypeCounts = [0,0]
+        
+        # Phase and file timings of run() and docs(). profile=True also
+        # counts the tokens read by the parsers.
+        self._profile = profile
+        self._report = profiling.Report(module)
+        
+    def report(self):
+        """Get the timings and counters of run() and docs() as a dict."""
+        return self._report.toDict()
+        
+    def _finishReport(self):
+        report = self._report
+        report.setCount("cpp lookups",self._symbolData.lookupCounts()[0])
+        report.setCount("cpp lookup misses",self._symbolData.lookupCounts()[1])
+        report.setCount("sip lookups",self._sipSymbolData.lookupCounts()[0])
+        report.setCount("sip lookup misses",self._sipSymbolData.lookupCounts()[1])
+        if self._profile:
+            report.setCount("cpp tokens",report.tokenCount("header"))
+            report.setCount("sip tokens",report.tokenCount("sip"))
+        print("\nTimings:")
+        print(report.summary())
+        
     def run(self):
+        report = self._report
+        report.start("cmake")
         print("Extracting header file list from CMake:")
         cppHeaderFilenameSet = self.extractCmakeListsHeaders()
 
@@ -102,38 +159,86 @@ class ModuleGenerator(object):
         cppHeaderFilenameList.sort()
         for filename in cppHeaderFilenameList:
             print("    Found %s" % (filename,))
+        report.stop()
         
-        print("\nParsing Cpp headers:")
-        headerScopeTuples = self._parseHeaders(cppHeaderFilenameList)
-        
+        report.start("import sip")
         print("\nParsing imported Sip files:")
         self._parseImportedSip()
+        report.stop()
+        
+        report.start("manifest")
+        headerHashes = dict( (filename,HashFile(filename)) for filename in cppHeaderFilenameList )
+        manifest = self._loadManifest() if self._incremental else None
+        changedSipNames = None
+        unchangedSipNames = None
+        parseHeaderList = cppHeaderFilenameList
+        if manifest is not None:
+            parseHeaderList = self._findChangedHeaders(manifest,cppHeaderFilenameList,headerHashes)
+            changedSipNames = set( (self._convertHeaderNameToSip(self._headerBasename(filename)) for filename in parseHeaderList) )
+            unchangedSipNames = set( (self._convertHeaderNameToSip(self._headerBasename(filename))
+                for filename in cppHeaderFilenameList if filename not in parseHeaderList) )
+            print("\n%i of %i header files changed." % (len(parseHeaderList),len(cppHeaderFilenameList)))
+        report.stop()
+        
+        report.start("parse headers")
+        print("\nParsing Cpp headers:")
+        headerScopeTuples = self._parseHeaders(parseHeaderList)
+        for filename,(basename,scope) in zip(parseHeaderList,headerScopeTuples):
+            self._cppHeaderScopes[filename] = scope
+        report.stop()
         
+        report.start("convert")
         print("\nConverting header files into Sip files.")
         moduleSipScopes = self._convertCppToSip(headerScopeTuples)
+        report.stop()
+        
+        previousSipScopes = None
+        if changedSipNames is not None:
+            # The unchanged headers are represented by their previous sip
+            # files. The previous sip files of changed headers are left out
+            # until they are merged, the same as in a full run.
+            report.start("previous sip")
+            print("\nParsing previous Sip files.")
+            previousSipScopes = self._importSipFile(self._indexFilename(),self._noUpdateSip)
+            for scope in previousSipScopes:
+                if self._convertHeaderNameToSip(scope.headerFilename()) in changedSipNames:
+                    self._sipSymbolData.removeScope(scope)
+            report.stop()
         
+        report.start("expand class names")
         print("\nExpanding class names:")
         for scope in moduleSipScopes:
             cpptosiptransformer.ExpandClassNames(self._sipSymbolData,scope)
+        report.stop()
 
+        report.start("annotate")
         print("\nAnnotating Sip files.")
         self._annotateSipScopes(moduleSipScopes)
+        report.stop()
         
+        report.start("merge")
         _indexFilename = self._indexFilename()
-        if os.path.exists(_indexFilename):
+        if previousSipScopes is not None:
+            print("\nMerging changed Sip files.")
+            moduleSipScopes = self._updateScopes(moduleSipScopes,previousSipScopes,unchangedSipNames)
+        elif os.path.exists(_indexFilename):
             print("\nParsing previous Sip files.")
             moduleSipScopes = self._updateScopes(moduleSipScopes)
         else:
             print("(%s not found. Skipping merge with previous sip files.)" % (_indexFilename,))
+        report.stop()
             
         print("\n")
 
+        report.start("convert to sub class code")
         print("Computing 'Convert To Sub Class Code'.")
         cpptosiptransformer.UpdateConvertToSubClassCodeDirectives(self._sipSymbolData,moduleSipScopes,self._noCTSCC)
+        report.stop()
         
         #print("Sanity check.")
         #cpptosiptransformer.SanityCheckSip(self._sipSymbolData,moduleSipScopes)
         #return
+        report.start("write sip")
         print("Writing Sip files.")
         if self._outputDirectory is not None:
 
@@ -142,13 +247,20 @@ class ModuleGenerator(object):
             else:
                 if not os.path.exists(self._outputDirectory):
                     os.mkdir(self._outputDirectory)
-                self._writeScopes(moduleSipScopes)
+                self._writeCounts = [0,0]
+                sipHashes = self._writeScopes(moduleSipScopes)
                 self._writeIndexSip(moduleSipScopes)
+                self._writeManifest(cppHeaderFilenameList,headerHashes,sipHashes)
+                print("    %i files written, %i unchanged files skipped." % tuple(self._writeCounts))
+                # These are the scopes that were just written, docs() can use them.
+                self._moduleSipScopes = moduleSipScopes
         else:        
             print("Warning: Skipping writing because no output directory was specified.")
+        report.stop()
         
         #for scope in moduleSipScopes:
         #    print(scope.format())
+        self._finishReport()
         print("Done.")
         
     def extractCmakeListsHeaders(self):
@@ -169,6 +281,9 @@ class ModuleGenerator(object):
         return expanded_headers
         
     def _parseHeaders(self,cppHeaderFilenameList):
+        if self._jobs > 1 and len(cppHeaderFilenameList) > 1 and _CanStartWorkers():
+            return self._parseHeadersParallel(cppHeaderFilenameList)
+            
         headerScopeTuples = []
         
         for filename in cppHeaderFilenameList:
@@ -176,26 +291,57 @@ class ModuleGenerator(object):
             with open(filename) as fhandle:
                 text = fhandle.read()
 
-            if self._cppHeaderMappingFunction is not None:
-                basename = self._cppHeaderMappingFunction(self,filename)
-            else:
-                basename = os.path.basename(filename)
-
+            basename = self._headerBasename(filename)
+            startWall,startCpu,startTokens = time.perf_counter(),time.process_time(),self._cppParser.tokenCount
             scope = self._cppParser.parse(self._symbolData, text, filename=filename, debugLevel=0)
+            self._report.addFile("header",filename,time.perf_counter()-startWall,time.process_time()-startCpu,
+                self._cppParser.tokenCount-startTokens if self._profile else None)
             scope.setHeaderFilename(basename)
             headerScopeTuples.append( (basename,scope) )
             #print(scope.format())
         return headerScopeTuples
+        
+    def _parseHeadersParallel(self,cppHeaderFilenameList):
+        # Each worker process parses with its own CppParser and sends the
+        # resulting scope back pickled. Results are collected in list order,
+        # which keeps the symbol data identical to a serial run.
+        jobList = [(filename,self._headerBasename(filename)) for filename in cppHeaderFilenameList]
+            
+        initArgs = (self._preprocessorValues, self._bareMacros, self._macros, self._preprocessSubstitutionMacros, self._profile)
+        headerScopeTuples = []
+        pool = multiprocessing.Pool(min(self._jobs,len(jobList)), _InitHeaderParserWorker, initArgs)
+        try:
+            for (filename,basename),result in zip(jobList,pool.imap(_ParseHeaderWorker,jobList)):
+                print("    Parsing %s" % (filename,))
+                if result is None:
+                    raise SystemExit(-1)
+                data,wall,cpu,tokens = result
+                self._report.addFile("header",filename,wall,cpu,tokens)
+                scope = self._symbolData.loadScopes(io.BytesIO(data))[0]
+                headerScopeTuples.append( (basename,scope) )
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        return headerScopeTuples
     
+    def _headerBasename(self,filename):
+        if self._cppHeaderMappingFunction is not None:
+            return self._cppHeaderMappingFunction(self,filename)
+        return os.path.basename(filename)
+        
     def _parseImportedSip(self):
         scopes = []
+        self._importedSipFilenames = []
         
         for sipImport in self._sipImports:
             filename = self._findSipMod(sipImport)
             if filename is None:
                 raise SystemExit
             print("    Parsing %s" % (filename,))
-            scopes.append(self._importSipFile(filename))
+            scopes.append(self._importSipFile(filename,imported=True))
         return scopes
         
     def _findSipMod(self,sipModName):
@@ -207,11 +353,51 @@ class ModuleGenerator(object):
             print("Error: Unable to find sip import '%s'. (sipImportDirs=%s" % (sipModName,repr(self._sipImportDirs)))
         return None
     
-    def _importSipFile(self,sipFilename,noUpdateSip=[],module=None):
+    def _importSipFile(self,sipFilename,noUpdateSip=[],module=None,imported=False):
+        if imported:
+            self._importedSipFilenames.append(sipFilename)
+        if imported and self._sipImportCache is not None:
+            # Files which have to be parsed again can at least skip the lexer.
+            self._sipParser.tokenCache = self._sipImportCache.tokenCache()
+            try:
+                scope = self._sipImportCache.load(sipFilename,module,self._parseSipFile)
+            finally:
+                self._sipParser.tokenCache = None
+            self._sipSymbolData.addScope(scope)
+        else:
+            scope = self._parseSipFile(self._sipSymbolData,sipFilename,module)
+        module = scope.module()
+        
+        # print(sipFilename + " -> " + scope.headerFilename())
+        
+        scopeList = [scope]
+        
+        #print("********************************************")
+        #print(scope.format())
+        
+        modDir = os.path.dirname(sipFilename)
+        
+        for item in scope:
+            if isinstance(item,self._sipSymbolData.SipDirective):
+                if item.body().startswith("%Include"):
+                    sipIncludeFilename = item.body()[len("%Include")+1:]
+                    if sipIncludeFilename not in noUpdateSip:
+                        sipIncludeFullFilename = os.path.join(modDir,sipIncludeFilename)
+                        if os.path.exists(sipIncludeFullFilename):
+                            scopeList.extend(self._importSipFile(sipIncludeFullFilename,module=module,imported=imported))
+                        else:
+                            print("Error: Unable to find sip import '%s'. (sipImportDirs=%s" % (sipIncludeFilename,repr(self._sipImportDirs)))
+                    
+        return scopeList
+        
+    def _parseSipFile(self,symbolData,sipFilename,module):
         with open(sipFilename) as fhandle:
             text = fhandle.read()
 
-        scope = self._sipParser.parse(self._sipSymbolData,text,filename=sipFilename,debugLevel=0)
+        startWall,startCpu,startTokens = time.perf_counter(),time.process_time(),self._sipParser.tokenCount
+        scope = self._sipParser.parse(symbolData,text,filename=sipFilename,debugLevel=0)
+        self._report.addFile("sip",sipFilename,time.perf_counter()-startWall,time.process_time()-startCpu,
+            self._sipParser.tokenCount-startTokens if self._profile else None)
         
         # Figure out the Cpp header file name.
         def extractHeader(directives,directiveName):
@@ -233,28 +419,7 @@ class ModuleGenerator(object):
                     module = item.body().split(' ')[1]
                     break
         scope.setModule(module)
-        
-        # print(sipFilename + " -> " + scope.headerFilename())
-        
-        scopeList = [scope]
-        
-        #print("********************************************")
-        #print(scope.format())
-        
-        modDir = os.path.dirname(sipFilename)
-        
-        for item in scope:
-            if isinstance(item,self._sipSymbolData.SipDirective):
-                if item.body().startswith("%Include"):
-                    sipIncludeFilename = item.body()[len("%Include")+1:]
-                    if sipIncludeFilename not in noUpdateSip:
-                        sipIncludeFullFilename = os.path.join(modDir,sipIncludeFilename)
-                        if os.path.exists(sipIncludeFullFilename):
-                            scopeList.extend(self._importSipFile(sipIncludeFullFilename,module=module))
-                        else:
-                            print("Error: Unable to find sip import '%s'. (sipImportDirs=%s" % (sipIncludeFilename,repr(self._sipImportDirs)))
-                    
-        return scopeList
+        return scope
         
     def _findAllInstance(self,scope,matchType):
         result = []
@@ -287,10 +452,26 @@ class ModuleGenerator(object):
         return filename
         
     def _writeScopes(self,moduleSipScopes):
+        # Returns a map from sip file name to the hash of its contents.
+        sipHashes = {}
+        indexFilename = self._indexFilename()
         for scope in moduleSipScopes:
-            fullPath = os.path.join(self._outputDirectory,self._convertHeaderNameToSip(scope.headerFilename()))
-            with open(fullPath,'w') as fhandle:
-                fhandle.write(scope.format())
+            if scope.headerFilename()==indexFilename:
+                # The previous index file, _writeIndexSip() writes the new one.
+                continue
+            sipName = self._convertHeaderNameToSip(scope.headerFilename())
+            text = scope.format()
+            sipHashes[sipName] = _HashText(text)
+            self._writeFileIfChanged(os.path.join(self._outputDirectory,sipName),text)
+        return sipHashes
+        
+    def _writeFileIfChanged(self,filename,text):
+        # Leave files with the same contents alone so that their mtime stays
+        # the same and sip/make don't rebuild them. Returns True if the file
+        # was written.
+        written = WriteFileIfChanged(filename,text)
+        self._writeCounts[0 if written else 1] += 1
+        return written
                 
     def _writeIndexSip(self,scopes):
         moduleName = self._module
@@ -298,8 +479,7 @@ class ModuleGenerator(object):
             moduleName = self._module[self._module.rfind('.')+1:]
         
         indexFilename = self._indexFilename()
-        with open(self._indexFilename(),'w') as fhandle:
-            fhandle.write(self._indexSip( [s for s in scopes if s.headerFilename()!=indexFilename] ))
+        self._writeFileIfChanged(indexFilename,self._indexSip( [s for s in scopes if s.headerFilename()!=indexFilename] ))
             
     def _indexFilename(self):
         module = self._module
@@ -307,8 +487,9 @@ class ModuleGenerator(object):
             module = module.rpartition('.')[2]
         return os.path.join(self._outputDirectory,module) + "mod.sip"
         
-    def _updateScopes(self,updateSipScopes):
-        previousSipScopes = self._importSipFile(self._indexFilename(),self._noUpdateSip)
+    def _updateScopes(self,updateSipScopes,previousSipScopes=None,unchangedSipNames=set()):
+        if previousSipScopes is None:
+            previousSipScopes = self._importSipFile(self._indexFilename(),self._noUpdateSip)
         
         # Match updateSipScopes
         updateSipMap = {}
@@ -321,9 +502,12 @@ class ModuleGenerator(object):
             previousScope = updateSipMap.get(filename,None)
             if previousScope is not None:
                 print("    Merging %s" % (filename,))
+                self._sipSymbolData.addScope(scope)
                 sipmerger.MergeSipScope(self._sipSymbolData,scope,updateSipMap[filename])
                 self._sipSymbolData.removeScope(updateSipMap[filename])
                 del updateSipMap[filename]
+            elif filename in unchangedSipNames:
+                self._sipSymbolData.addScope(scope)
             else:
                 print("    (Missing header file to match %s. Skipping merge.)" % (filename,) )
             
@@ -333,6 +517,61 @@ class ModuleGenerator(object):
             
         return previousSipScopes
         
+    def _manifestFilename(self):
+        return self._indexFilename()[:-len(".sip")] + ".manifest"
+        
+    def _loadManifest(self):
+        # Returns the manifest of the previous run, or None if all headers
+        # need to be processed.
+        if self._outputDirectory is None or not os.path.exists(self._indexFilename()):
+            return None
+        manifestFilename = self._manifestFilename()
+        if not os.path.exists(manifestFilename):
+            print("(%s not found. Processing all header files.)" % (manifestFilename,))
+            return None
+        try:
+            with open(manifestFilename) as fhandle:
+                manifest = json.load(fhandle)
+        except ValueError:
+            print("Warning: Unable to read %s. Processing all header files." % (manifestFilename,))
+            return None
+        if manifest.get('config')!=self._configHash:
+            print("(Generator configuration changed. Processing all header files.)")
+            return None
+        if manifest.get('imports')!=self._importsHash():
+            print("(Imported sip files changed. Processing all header files.)")
+            return None
+        return manifest
+        
+    def _findChangedHeaders(self,manifest,cppHeaderFilenameList,headerHashes):
+        changed = []
+        for filename in cppHeaderFilenameList:
+            entry = manifest['headers'].get(filename)
+            sipName = self._convertHeaderNameToSip(self._headerBasename(filename))
+            sipFilename = os.path.join(self._outputDirectory,sipName)
+            if entry is None or entry['hash']!=headerHashes[filename] or entry['sip']!=sipName \
+                    or not os.path.exists(sipFilename) or HashFile(sipFilename)!=manifest['sips'].get(sipName):
+                changed.append(filename)
+        return changed
+        
+    def _writeManifest(self,cppHeaderFilenameList,headerHashes,sipHashes):
+        manifest = {
+            'config': self._configHash,
+            'imports': self._importsHash(),
+            'headers': dict( (filename, {'hash': headerHashes[filename],
+                    'sip': self._convertHeaderNameToSip(self._headerBasename(filename))})
+                for filename in cppHeaderFilenameList ),
+            'sips': sipHashes
+        }
+        WriteFileIfChanged(self._manifestFilename(),json.dumps(manifest,indent=1,sort_keys=True))
+            
+    def _importsHash(self):
+        digest = hashlib.sha1()
+        for filename in self._importedSipFilenames:
+            digest.update(filename.encode('utf-8'))
+            digest.update(HashFile(filename).encode('ascii'))
+        return digest.hexdigest()
+        
     def _indexSip(self,scopes):
         def key(x): return x.headerFilename()
         scopes.sort(key=key)
@@ -370,6 +609,8 @@ class ModuleGenerator(object):
         return ''.join(accu)
 
     def docs(self):
+        report = self._report
+        report.start("docs cmake")
         print("Extracting header file list from CMake:")
         cppHeaderFilenameSet = self.extractCmakeListsHeaders()
         
@@ -380,39 +621,103 @@ class ModuleGenerator(object):
         cppHeaderFilenameList.sort()
         for filename in cppHeaderFilenameList:
             print("    Found %s" % (filename,))
+        report.stop()
         
+        # Headers and sip files which were already parsed by run() are reused.
+        report.start("docs parse headers")
         print("\nParsing Cpp headers:")
-        headerScopeTuples = self._parseHeaders(cppHeaderFilenameList)
-        cppScopes = [ x[1] for x in headerScopeTuples]
-
-        print("\nParsing imported Sip files:")
-        self._parseImportedSip()
-        
-        print("\nParsing module files:")
-        previousSipScopes = self._importSipFile(self._indexFilename(),self._noUpdateSip)
-        
+        parseHeaderList = [filename for filename in cppHeaderFilenameList if filename not in self._cppHeaderScopes]
+        for filename,(basename,scope) in zip(parseHeaderList,self._parseHeaders(parseHeaderList)):
+            self._cppHeaderScopes[filename] = scope
+        cppScopes = [self._cppHeaderScopes[filename] for filename in cppHeaderFilenameList]
+        report.stop()
+
+        if self._moduleSipScopes is None:
+            report.start("docs import sip")
+            print("\nParsing imported Sip files:")
+            self._parseImportedSip()
+            
+            print("\nParsing module files:")
+            self._moduleSipScopes = self._importSipFile(self._indexFilename(),self._noUpdateSip)
+            report.stop()
+        previousSipScopes = self._moduleSipScopes
+        
+        self._docsWriteCounts = [0,0]
+        self._linkTypeCache = {}
+        self._linkTypeCounts = [0,0]
+        report.start("docs index page")
         print("\nWriting index page:")
         self.writeModuleIndexPage(previousSipScopes)
+        report.stop()
         
+        report.start("docs class pages")
         print("\nWriting class pages:")
         subclassMapping = BuildSubclassMap(previousSipScopes,self._sipSymbolData)
         #print(repr(subclassMapping))
         
         # Write out the
-        def writeScopeDocs(scope):
+        classList = []
+        def collectScopeClasses(scope):
             for item in scope:
                 if isinstance(item,self._sipSymbolData.SipClass):
-                    self.writeClassDoc(item,subclassMapping)
-                    writeScopeDocs(item)
+                    classList.append(item)
+                    collectScopeClasses(item)
                 elif isinstance(item,self._sipSymbolData.Namespace):
-                    writeScopeDocs(item)
+                    collectScopeClasses(item)
         for scope in previousSipScopes:
-            writeScopeDocs(scope)
+            collectScopeClasses(scope)
+        self.writeClassDocs(classList,subclassMapping)
+        report.stop()
 
+        report.start("docs namespace pages")
         print("\nWriting namespace pages:")
         self.writeNamespaces(previousSipScopes,cppScopes)
+        report.stop()
+        print("    %i pages written, %i unchanged pages skipped." % tuple(self._docsWriteCounts))
+        hits,misses = self._linkTypeCounts
+        print("    Type link cache: %i hits, %i misses (%.1f%% hit rate)." % (hits,misses,100.0*hits/max(hits+misses,1)))
+        report.setCount("type link cache hits",hits)
+        report.setCount("type link cache misses",misses)
+        self._finishReport()
         return previousSipScopes
 
+    def writeClassDocs(self, classList, subclassMapping):
+        # Class pages only read the symbol data, so they can be rendered by
+        # forked workers which inherit it. Each worker's output is printed in
+        # class order.
+        if self._jobs <= 1 or len(classList) <= 1 or "fork" not in multiprocessing.get_all_start_methods() \
+                or not _CanStartWorkers():
+            for sipClass in classList:
+                self.writeClassDoc(sipClass,subclassMapping)
+            return
+            
+        global _classDocsJob
+        _classDocsJob = (self,classList,subclassMapping)
+        try:
+            pool = multiprocessing.get_context("fork").Pool(min(self._jobs,len(classList)))
+            try:
+                for log,(written,unchanged),(hits,misses) in pool.imap(_WriteClassDocWorker,range(len(classList)),8):
+                    print(log,end='')
+                    self._docsWriteCounts[0] += written
+                    self._docsWriteCounts[1] += unchanged
+                    self._linkTypeCounts[0] += hits
+                    self._linkTypeCounts[1] += misses
+                pool.close()
+            except:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+        finally:
+            # Don't keep the generator alive in this process.
+            _classDocsJob = None
+
+    def _writePage(self, filename, page):
+        # Pages are built in memory and written in one go, unchanged pages
+        # are left alone.
+        written = WriteFileIfChanged(filename,page.getvalue())
+        self._docsWriteCounts[0 if written else 1] += 1
+
     # @accepts(sipsymboldata.SymbolData.SipClass, dict)
     def writeClassDoc(self, sipClass, subclassMapping):
         classComment = ""
@@ -489,7 +794,7 @@ class ModuleGenerator(object):
         # create class page and add header
         className = sipClass.fqPythonName()    # FIXME fqn required plus the python name.
 
-        page = open(os.path.join(self._docsOutputDirectory, "%s.html" % className), 'w')
+        page = io.StringIO()
         page.write(htmlHeader % {'title': className, 'path': '../'})
         
         if isSipClassAbstract(sipClass):
@@ -606,7 +911,7 @@ class ModuleGenerator(object):
     
         # footer
         page.write(htmlFooter % {'path': '../'})
-        page.close()
+        self._writePage(os.path.join(self._docsOutputDirectory, "%s.html" % className), page)
         
     # @accepts(list, types.FunctionType, str, useSelf=bool)
     # @returns(str)
@@ -941,7 +1246,7 @@ class ModuleGenerator(object):
         else:
             mainDocs = ''
 
-        page = open(os.path.join(self._docsOutputDirectory, 'index.html'), 'w')
+        page = io.StringIO()
         page.write(htmlHeader % {'title': ('Module %s' % self._module), 'path': '../'})
         page.write("<h1>%s Module</h1>\n" % self._module)
         page.write("<hr>")
@@ -960,7 +1265,7 @@ class ModuleGenerator(object):
         self.writeNSClassIndex(page, classList)
 
         page.write(htmlFooter % {'path': '../'})
-        page.close()
+        self._writePage(os.path.join(self._docsOutputDirectory, 'index.html'), page)
 
     # @accepts(list,list)
     def writeNamespaces(self,sipScopes,cppScopes):
@@ -983,7 +1288,7 @@ class ModuleGenerator(object):
     def writeNamespacePage(self,nsName,nsList,cppScopes):
 #        print(repr(cppScopes))
         # create namespace page and add header
-        nspage = open(os.path.join(self._docsOutputDirectory, "%s.html" % nsName), 'w')
+        nspage = io.StringIO()
         nspage.write(htmlHeader % {'title': nsName, 'path': '../'})
 
         importcode = "from %s.%s import *" % (self._module,nsName)
@@ -1064,7 +1369,7 @@ class ModuleGenerator(object):
 
         # footer
         nspage.write (htmlFooter % {'path': '../'})
-        nspage.close ()
+        self._writePage(os.path.join(self._docsOutputDirectory, "%s.html" % nsName), nspage)
 
     # @accepts(file,list)
     def writeNSNamespacesIndex(self, page, namespaces):
@@ -1135,7 +1440,7 @@ class ModuleGenerator(object):
         nsNames.sort(key=key)
         classNames.sort(key=key)
 
-        page = open(os.path.join(htmldst, 'allclasses.html'), 'w')
+        page = io.StringIO()
         page.write(htmlHeader % {'title': 'PyKDE Namespace and Class Index', 'path': ''})
 
         # Namespaces
@@ -1167,11 +1472,11 @@ class ModuleGenerator(object):
         page.write(FormatTable(classNames, format, t_key, columns=2))
 
         page.write(htmlFooter % {'path': ''})
-        page.close()
+        WriteFileIfChanged(os.path.join(htmldst, 'allclasses.html'), page.getvalue())
 
     @staticmethod
     def WriteMainPage(htmldst):
-        page = open(os.path.join(htmldst, 'modules.html'), 'w')
+        page = io.StringIO()
         page.write(htmlHeader % {'title': 'KDE 5 PyKDE API Reference', 'path': ''})
 
         page.write("""<p>
@@ -1195,7 +1500,7 @@ code fragments in the documentation have not been translated from C++ to Python.
 
         page.write(htmlFooter % {'path': ''})
 
-        page.close()
+        WriteFileIfChanged(os.path.join(htmldst, 'modules.html'), page.getvalue())
 
     # @accepts(sipsymboldata.SymbolData.Argument,sipsymboldata.SymbolData.Entity)
     # @returns(str)
@@ -1208,21 +1513,13 @@ code fragments in the documentation have not been translated from C++ to Python.
     # @accepts(str,sipsymboldata.SymbolData.Entity)
     # @returns(str)
     def formatType(self, ret, context):
-        r = ''
         if not ret or ret == 'void':
             return ''
             
-        for i in range(len(ret)):
-            if not ret[i] in ('*', '&'):
-                r += ret[i]
-
-        if ret=="char":
-            ret = "QString"
-        
         #if rObj.parentScope():
         #    r = '.'.join ([rObj.parentScope().fqName(), r])
-        r = self.linkType(r, context)
-        return r
+        # linkType() drops the '*' and '&' decorations.
+        return self.linkType(ret, context)
 
     CppPythonTypeMapping = {
         'bool': 'bool',
@@ -1247,10 +1544,22 @@ code fragments in the documentation have not been translated from C++ to Python.
     }
         
     def linkType(self, typeName, context):
-        if typeName.startswith("const "):
-            typeName = typeName[6:]
-        while typeName.endswith('*') or typeName.endswith('&'):
-            typeName = typeName[:-1]
+        # typeName is a string or a typeref.TypeRef.
+        # The same types turn up on nearly every page. The HTML is cached for
+        # the docs() run by base type and the scope it is resolved in.
+        typeRef = typeref.ParseType(typeName) if isinstance(typeName,str) else typeName
+        key = (typeRef.base(),context)
+        result = self._linkTypeCache.get(key)
+        if result is None:
+            self._linkTypeCounts[1] += 1
+            result = self._linkTypeUncached(typeRef, context)
+            self._linkTypeCache[key] = result
+        else:
+            self._linkTypeCounts[0] += 1
+        return result
+        
+    def _linkTypeUncached(self, typeRef, context):
+        typeName = typeRef.base()
 
         if typeName == '...':
             return typeName
@@ -1258,30 +1567,20 @@ code fragments in the documentation have not been translated from C++ to Python.
         if typeName == 'char':
             typeName = 'QString'
 
-        # Handle QList<...>
-        if typeName.startswith("QList<"):
-            return '[' + self.linkType(typeName[6:-1],context) + ']'
-            
-        if typeName.startswith("QFlags<"):
-            return 'QFlags&lt;' + self.linkType(typeName[7:-1],context) + '&gt;'
-
-        if typeName.startswith("QHash<"):
-            pivot = typeName.index(",")
-            leftType = self.linkType(typeName[6:pivot],context)
-            rightType = self.linkType(typeName[pivot+1:-1],context)
-            return '{' + leftType + ':'+ rightType + '}'
-
-        if typeName.startswith("QMap<"):
-            pivot = typeName.index(",")
-            leftType = self.linkType(typeName[5:pivot],context)
-            rightType = self.linkType(typeName[pivot+1:-1],context)
+        templateName = typeRef.name()
+        templateArgs = typeRef.templateArgs()
+        if len(templateArgs)==1:
+            if templateName=="QList":
+                return '[' + self.linkType(templateArgs[0],context) + ']'
+            if templateName=="QFlags":
+                return 'QFlags&lt;' + self.linkType(templateArgs[0],context) + '&gt;'
+                
+        elif len(templateArgs)==2 and templateName in ("QHash","QMap","QPair"):
+            leftType = self.linkType(templateArgs[0],context)
+            rightType = self.linkType(templateArgs[1],context)
+            if templateName=="QPair":
+                return '(' + leftType + ','+ rightType + ')'
             return '{' + leftType + ':'+ rightType + '}'
-            
-        if typeName.startswith("QPair<"):
-            pivot = typeName.index(",")
-            leftType = self.linkType(typeName[6:pivot],context)
-            rightType = self.linkType(typeName[pivot+1:-1],context)
-            return '(' + leftType + ','+ rightType + ')'
 
         if typeName.startswith("Qt.") or typeName.startswith("Qt::"):
             return '<a href="http://www.riverbankcomputing.co.uk/static/Docs/PyQt4/html/qt.html">' + typeName + '</a>'
@@ -1294,7 +1593,8 @@ code fragments in the documentation have not been translated from C++ to Python.
         try:
             typeObject = self._sipSymbolData.lookupType(typeName.replace('.','::'),context)
             
-            if isinstance(typeObject,self._sipSymbolData.Typedef) and not (typeObject.argumentType() is not None and typeObject.argumentType().startswith('QFlags')) and typeObject.argumentType() is not None:
+            if isinstance(typeObject,self._sipSymbolData.Typedef) and typeObject.argumentType() is not None and \
+                    typeref.ParseType(typeObject.argumentType()).name()!='QFlags':
                 return self.linkType(typeObject.argumentType(),context)
 
             #print("typeObject: "+repr(typeObject))
@@ -1356,6 +1656,100 @@ code fragments in the documentation have not been translated from C++ to Python.
         else:
             return ''
 
+def _HashText(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def _GeneratorVersion():
+    return SourceVersion(['cppparser.py', 'cpplexer.py', 'pplexer.py', 'exprparser.py', 'cppsymboldata.py',
+        'typeref.py', 'sipsymboldata.py', 'sipparser.py', 'siplexer.py', 'cpptosiptransformer.py', 'sipmerger.py', 'toolkit.py'])
+
+def _Fingerprint(value):
+    # Stable text representation of configuration values for hashing.
+    functions = set()   # Guards against recursive closures.
+    def fingerprint(value):
+        if value is None or isinstance(value,(str,int,float,bool)):
+            return repr(value)
+        if isinstance(value,(list,tuple)):
+            return "[" + ",".join(fingerprint(item) for item in value) + "]"
+        if isinstance(value,(set,frozenset)):
+            return "{" + ",".join(sorted(fingerprint(item) for item in value)) + "}"
+        if isinstance(value,dict):
+            return "{" + ",".join(sorted(fingerprint(key)+":"+fingerprint(item) for key,item in value.items())) + "}"
+        if isinstance(value,type(re.compile(""))):
+            return "re(" + repr(value.pattern) + "," + repr(value.flags) + ")"
+        if isinstance(value,types.CodeType):
+            # Constants include the code of nested functions and lambdas.
+            return "code(" + hashlib.sha1(value.co_code).hexdigest() + "," + fingerprint(value.co_consts) + "," + \
+                fingerprint(value.co_names) + ")"
+        if isinstance(value,types.FunctionType):
+            if value in functions:
+                return "function(" + value.__module__ + "." + value.__qualname__ + ")"
+            functions.add(value)
+            cells = []
+            for cell in value.__closure__ or ():
+                try:
+                    cells.append(cell.cell_contents)
+                except ValueError:
+                    cells.append(None)
+            return "function(" + value.__module__ + "." + value.__qualname__ + "," + fingerprint(value.__code__) + "," + \
+                fingerprint(value.__defaults__) + "," + fingerprint(value.__kwdefaults__) + "," + fingerprint(cells) + ")"
+        if isinstance(value,types.MethodType):
+            return "method(" + fingerprint(value.__func__) + "," + fingerprint(value.__self__) + ")"
+        if hasattr(value,'__dict__'):
+            # Not the wedge class, its name depends on $TWINE2_SEALED.
+            return RealClass(type(value)).__name__ + fingerprint(vars(value))
+        return repr(value)
+    return hashlib.sha1(fingerprint(value).encode('utf-8')).hexdigest()
+
+def _CanStartWorkers():
+    # Pool workers are daemonic processes, which may not have children of
+    # their own. Inside one, e.g. under kf5.py --jobs, work serially.
+    return not multiprocessing.current_process().daemon
+
+_workerCppParser = None
+
+def _InitHeaderParserWorker(preprocessorValues,bareMacros,macros,preprocessSubstitutionMacros,profile):
+    global _workerCppParser
+    _workerCppParser = cppparser.CppParser()
+    _workerCppParser.countTokens = profile
+    _workerCppParser.preprocessorValues = preprocessorValues
+    _workerCppParser.bareMacros = bareMacros
+    _workerCppParser.macros = macros
+    _workerCppParser.preprocessorSubstitutionMacros = preprocessSubstitutionMacros
+
+_classDocsJob = None
+
+def _WriteClassDocWorker(index):
+    # Runs in a process forked by writeClassDocs().
+    generator,classList,subclassMapping = _classDocsJob
+    generator._docsWriteCounts = [0,0]
+    generator._linkTypeCounts = [0,0]
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        generator.writeClassDoc(classList[index],subclassMapping)
+    return (log.getvalue(),tuple(generator._docsWriteCounts),tuple(generator._linkTypeCounts))
+
+def _ParseHeaderWorker(job):
+    filename,basename = job
+    with open(filename) as fhandle:
+        text = fhandle.read()
+        
+    symbolData = cppsymboldata.SymbolData()
+    startWall,startCpu,startTokens = time.perf_counter(),time.process_time(),_workerCppParser.tokenCount
+    try:
+        scope = _workerCppParser.parse(symbolData, text, filename=filename, debugLevel=0)
+    except SystemExit:
+        # CppParser exits on a parse error. Tell the parent instead of taking down the worker.
+        return None
+    scope.setHeaderFilename(basename)
+    
+    wall,cpu = time.perf_counter()-startWall,time.process_time()-startCpu
+    tokens = _workerCppParser.tokenCount-startTokens if _workerCppParser.countTokens else None
+    
+    buffer = io.BytesIO()
+    symbolData.dumpScopes([scope],buffer)
+    return (buffer.getvalue(),wall,cpu,tokens)
+
 def AnnotationRule(methodTypeMatch,parameterTypeMatch,parameterNameMatch,annotations):
     return cpptosiptransformer.MethodAnnotationRule(methodTypeMatch,parameterTypeMatch,parameterNameMatch,annotations)
 
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import unittest
+import os
+import os.path
+import shutil
+import tempfile
+import toolkit
+
+HEADERS = {
+"foo.h": """
+#ifndef FOO_H
+#define FOO_H
+#define FOO_EXPORT
+class FOO_EXPORT Foo : public QObject {
+public:
+    Foo(QObject *parent=0);
+    enum Mode { ModeA, ModeB };
+    int bar(Mode mode=ModeA) const;
+protected:
+    virtual void baz();
+};
+#endif
+""",
+"bar.h": """
+namespace Bar {
+    class Baz {
+    public:
+        QString name() const;
+        static Baz *create(const QString &name);
+    };
+    typedef QList<Baz*> BazList;
+}
+""",
+"qux.h": """
+class Qux {
+public:
+    int x;
+    void reset();
+};
+"""
+}
+
+class RecordingModuleGenerator(toolkit.ModuleGenerator):
+    def __init__(self,**kw):
+        self.parsedHeaders = []
+        toolkit.ModuleGenerator.__init__(self,**kw)
+
+    def _parseHeaders(self,cppHeaderFilenameList):
+        self.parsedHeaders.extend(cppHeaderFilenameList)
+        return toolkit.ModuleGenerator._parseHeaders(self,cppHeaderFilenameList)
+
+class TestModuleGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        for name,text in HEADERS.items():
+            with open(os.path.join(self.tmpdir,name),'w') as fhandle:
+                fhandle.write(text)
+        with open(os.path.join(self.tmpdir,"CMakeLists.txt"),'w') as fhandle:
+            fhandle.write("project(foo)\n")
+        self.headers = sorted(os.path.join(self.tmpdir,name) for name in HEADERS)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def generator(self,outputDirectory="sip",**kw):
+        generator = RecordingModuleGenerator(module="PyFoo.foo",
+            cmakelists=os.path.join(self.tmpdir,"CMakeLists.txt"),
+            headers=[os.path.join(self.tmpdir,"*.h")],
+            outputDirectory=os.path.join(self.tmpdir,outputDirectory),
+            useSipCache=False,
+            **kw)
+        return generator
+
+    def readOutput(self,outputDirectory="sip"):
+        result = {}
+        for name in os.listdir(os.path.join(self.tmpdir,outputDirectory)):
+            if name.endswith(".sip"):
+                with open(os.path.join(self.tmpdir,outputDirectory,name)) as fhandle:
+                    result[name] = fhandle.read()
+        return result
+
+    def testParallelParse(self):
+        serial = self.generator()._parseHeaders(self.headers)
+        parallel = self.generator(jobs=2)._parseHeaders(self.headers)
+        self.assertEqual([name for name,scope in parallel],[name for name,scope in serial])
+        for (name,serialScope),(name,parallelScope) in zip(serial,parallel):
+            self.assertEqual(parallelScope.format(),serialScope.format())
+            self.assertEqual(parallelScope.headerFilename(),serialScope.headerFilename())
+
+    def testIncremental(self):
+        self.generator(incremental=True).run()
+        shutil.copytree(os.path.join(self.tmpdir,"sip"),os.path.join(self.tmpdir,"sip2"))
+
+        # Nothing changed.
+        generator = self.generator(incremental=True)
+        generator.run()
+        self.assertEqual(generator.parsedHeaders,[])
+
+        quxHeader = os.path.join(self.tmpdir,"qux.h")
+        with open(quxHeader,'w') as fhandle:
+            fhandle.write(HEADERS["qux.h"].replace("void reset();","void reset();\n    Foo *foo() const;"))
+        generator = self.generator(incremental=True)
+        generator.run()
+        self.assertEqual(generator.parsedHeaders,[quxHeader])
+
+        self.generator(outputDirectory="sip2").run()
+        result = self.readOutput()
+        self.assertEqual(result,self.readOutput("sip2"))
+        self.assertTrue("foo () const;" in result["qux.sip"])
+
+    def testIncrementalEditedSip(self):
+        self.generator(incremental=True).run()
+        with open(os.path.join(self.tmpdir,"sip","bar.sip"),'a') as fhandle:
+            fhandle.write("\n")
+        generator = self.generator(incremental=True)
+        generator.run()
+        self.assertEqual(generator.parsedHeaders,[os.path.join(self.tmpdir,"bar.h")])
+
+    def testIncrementalChangedMapping(self):
+        def mapper(mod,filename):
+            return "foo/" + os.path.basename(filename)
+        self.generator(incremental=True,cppHeaderMappingFunction=mapper).run()
+
+        # Only a string literal differs.
+        def mapper(mod,filename):
+            return "kfoo/" + os.path.basename(filename)
+        generator = self.generator(incremental=True,cppHeaderMappingFunction=mapper)
+        generator.run()
+        self.assertEqual(sorted(generator.parsedHeaders),self.headers)
+
+    def testFingerprintSealedMode(self):
+        # The configuration hash doesn't depend on $TWINE2_SEALED.
+        rule = toolkit.AnnotationRule("*",["QObject*"],"parent","TransferThis")
+        plainRule = object.__new__(toolkit.RealClass(type(rule)))
+        plainRule.__dict__.update(vars(rule))
+        self.assertEqual(toolkit._Fingerprint([rule]),toolkit._Fingerprint([plainRule]))
+
+    def testUnchangedFilesNotWritten(self):
+        self.generator().run()
+        outputDirectory = os.path.join(self.tmpdir,"sip")
+        mtimes = {}
+        for name in os.listdir(outputDirectory):
+            filename = os.path.join(outputDirectory,name)
+            os.utime(filename,(1000000000,1000000000))
+            mtimes[name] = os.stat(filename).st_mtime
+
+        generator = self.generator()
+        generator.run()
+        self.assertEqual(generator._writeCounts,[0,4])
+        for name in os.listdir(outputDirectory):
+            self.assertEqual(os.stat(os.path.join(outputDirectory,name)).st_mtime,mtimes[name])
+
+        with open(os.path.join(self.tmpdir,"foo.h"),'a') as fhandle:
+            fhandle.write("void globalFoo();\n")
+        generator = self.generator()
+        generator.run()
+        self.assertEqual(generator._writeCounts,[1,3])
+        self.assertNotEqual(os.stat(os.path.join(outputDirectory,"foo.sip")).st_mtime,mtimes["foo.sip"])
+
+    def testDocsReusesRun(self):
+        docsDirectory = os.path.join(self.tmpdir,"html")
+        os.mkdir(docsDirectory)
+        self.generator(docsOutputDirectory=docsDirectory).run()
+        expected = self.generator(docsOutputDirectory=docsDirectory).docs()
+        pages = sorted(os.listdir(docsDirectory))
+
+        shutil.rmtree(docsDirectory)
+        os.mkdir(docsDirectory)
+        generator = self.generator(docsOutputDirectory=docsDirectory)
+        generator.run()
+        del generator.parsedHeaders[:]
+        result = generator.docs()
+        self.assertEqual(generator.parsedHeaders,[])
+        self.assertEqual(sorted(os.listdir(docsDirectory)),pages)
+        self.assertEqual(sorted(scope.format() for scope in result if scope.headerFilename()!=generator._indexFilename()),
+            sorted(scope.format() for scope in expected if scope.headerFilename()!=generator._indexFilename()))
+
+    def readPages(self,docsDirectory):
+        result = {}
+        for name in os.listdir(docsDirectory):
+            with open(os.path.join(docsDirectory,name)) as fhandle:
+                result[name] = fhandle.read()
+        return result
+
+    def testParallelDocs(self):
+        self.generator().run()
+        serialDirectory = os.path.join(self.tmpdir,"html")
+        parallelDirectory = os.path.join(self.tmpdir,"html2")
+        os.mkdir(serialDirectory)
+        os.mkdir(parallelDirectory)
+        self.generator(docsOutputDirectory=serialDirectory).docs()
+        generator = self.generator(docsOutputDirectory=parallelDirectory,jobs=2)
+        generator.docs()
+        self.assertEqual(self.readPages(parallelDirectory),self.readPages(serialDirectory))
+        self.assertTrue("Foo.html" in self.readPages(parallelDirectory))
+        self.assertEqual(generator._docsWriteCounts[1],0)
+
+        generator = self.generator(docsOutputDirectory=parallelDirectory,jobs=2)
+        generator.docs()
+        self.assertEqual(generator._docsWriteCounts[0],0)
+
+    def testLinkTypeCache(self):
+        generator = self.generator()
+        generator.run()
+        scope = generator._moduleSipScopes[0]
+        first = generator.linkType("QMap<QString,const qreal*>",scope)
+        self.assertEqual(first,"{QString:float}")
+        self.assertEqual(generator._linkTypeCounts,[0,3])
+        self.assertEqual(generator.linkType("QMap<QString,const qreal*>",scope),first)
+        self.assertEqual(generator._linkTypeCounts,[1,3])
+        self.assertEqual(generator.formatType("const qreal&",scope),"float")
+
+    def testReport(self):
+        generator = self.generator(profile=True)
+        generator.run()
+        report = generator.report()
+        self.assertEqual(report["module"],"PyFoo.foo")
+        phaseNames = [phase["name"] for phase in report["phases"]]
+        self.assertTrue("parse headers" in phaseNames)
+        self.assertTrue("write sip" in phaseNames)
+        headers = [entry for entry in report["files"] if entry["kind"]=="header"]
+        self.assertEqual(sorted(entry["filename"] for entry in headers),self.headers)
+        self.assertTrue(all(entry["tokens"]>0 for entry in headers))
+        self.assertEqual(report["counters"]["cpp tokens"],sum(entry["tokens"] for entry in headers))
+        self.assertTrue(report["counters"]["sip lookups"]>0)
+
+        parallel = self.generator(profile=True,jobs=2)
+        parallel._parseHeaders(self.headers)
+        self.assertEqual(sorted((entry["filename"],entry["tokens"]) for entry in parallel.report()["files"]),
+            sorted((entry["filename"],entry["tokens"]) for entry in headers))
+
+if __name__ == '__main__':
+    unittest.main()
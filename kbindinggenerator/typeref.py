@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import re
+import sys
+
+# const prefix, base type and pointer/reference suffix of a type as the C++
+# and sip parsers write it, e.g. "const QList<QString>&" or "char*const".
+_typeRegex = re.compile(r'^(const )?(.*?)((?:\*const|\*|&|\[\])*)$')
+
+# Type text -> TypeRef
+_typeRefs = {}
+
+class TypeRef(object):
+    """A parsed argument or return type like `const QList<QString>&`.
+
+    Type refs are interned, get them with ParseType(). Types with the same
+    text are the same object, so they compare and hash by identity.
+    """
+    __slots__ = ('_text', '_const', '_base', '_name', '_templateArgs', '_suffix')
+    # Not @sealed, the wedge class would pickle it by state and skip the
+    # interning.
+    def __init__(self, text, const, base, name, templateArgs, suffix):
+        self._text = text
+        self._const = const
+        self._base = base
+        self._name = name
+        self._templateArgs = templateArgs
+        self._suffix = suffix
+
+    def text(self):
+        """The type as written, e.g. `const QList<QString>&`."""
+        return self._text
+
+    def isConst(self):
+        return self._const
+
+    def base(self):
+        """The type without const and suffix, e.g. `QList<QString>`."""
+        return self._base
+
+    def name(self):
+        """The type name without template arguments, e.g. `QList`."""
+        return self._name
+
+    def templateArgs(self):
+        """Tuple of TypeRefs for the template arguments."""
+        return self._templateArgs
+
+    def suffix(self):
+        """Pointer and reference decorations, e.g. `*`, `&` or `*const`."""
+        return self._suffix
+
+    def __str__(self):
+        return self._text
+
+    def __repr__(self):
+        return "<TypeRef %r>" % (self._text,)
+
+    def __reduce__(self):
+        return (ParseType, (self._text,))
+
+def ParseType(text):
+    """Get the interned TypeRef for a type string."""
+    typeRef = _typeRefs.get(text)
+    if typeRef is None:
+        typeRef = _ParseType(text)
+        _typeRefs[typeRef.text()] = typeRef
+    return typeRef
+
+def _ParseType(text):
+    text = sys.intern(text)
+    const,base,suffix = _typeRegex.match(text).groups()
+    name = base
+    templateArgs = ()
+    start = base.find('<')
+    if start!=-1 and base.endswith('>'):
+        name = base[:start]
+        templateArgs = tuple(ParseType(arg) for arg in _SplitTemplateArgs(base[start+1:-1]))
+    return TypeRef(text, const is not None, sys.intern(base), sys.intern(name), templateArgs, suffix)
+
+def _SplitTemplateArgs(text):
+    # Split at the commas which are not inside nested template arguments.
+    args = []
+    depth = 0
+    start = 0
+    for i,c in enumerate(text):
+        if c=='<':
+            depth += 1
+        elif c=='>':
+            depth -= 1
+        elif c==',' and depth==0:
+            args.append(text[start:i].strip())
+            start = i+1
+    args.append(text[start:].strip())
+    return args
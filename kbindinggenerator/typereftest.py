@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+#     Copyright 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import unittest
+import pickle
+import typeref
+
+class TestTypeRef(unittest.TestCase):
+
+    def testSimple(self):
+        ref = typeref.ParseType("const QString&")
+        self.assertEqual(ref.text(),"const QString&")
+        self.assertTrue(ref.isConst())
+        self.assertEqual(ref.base(),"QString")
+        self.assertEqual(ref.name(),"QString")
+        self.assertEqual(ref.templateArgs(),())
+        self.assertEqual(ref.suffix(),"&")
+
+        ref = typeref.ParseType("unsigned int")
+        self.assertFalse(ref.isConst())
+        self.assertEqual(ref.name(),"unsigned int")
+        self.assertEqual(ref.suffix(),"")
+
+        self.assertEqual(typeref.ParseType("char*const").name(),"char")
+        self.assertEqual(typeref.ParseType("char*const").suffix(),"*const")
+        self.assertEqual(typeref.ParseType("Foo*&").suffix(),"*&")
+
+    def testTemplate(self):
+        ref = typeref.ParseType("const QHash<QPair<int,QString>,QList<Foo*>>&")
+        self.assertEqual(ref.base(),"QHash<QPair<int,QString>,QList<Foo*>>")
+        self.assertEqual(ref.name(),"QHash")
+        self.assertEqual([arg.text() for arg in ref.templateArgs()],["QPair<int,QString>","QList<Foo*>"])
+        self.assertEqual([arg.text() for arg in ref.templateArgs()[0].templateArgs()],["int","QString"])
+        self.assertEqual(ref.templateArgs()[1].templateArgs()[0].suffix(),"*")
+
+    def testInterned(self):
+        ref = typeref.ParseType("QList<QString>")
+        self.assertIs(typeref.ParseType("QList<QString>"),ref)
+        self.assertIs(typeref.ParseType("const QString&").templateArgs(),())
+        self.assertIs(ref.templateArgs()[0],typeref.ParseType("QString"))
+        self.assertIs(pickle.loads(pickle.dumps(ref,pickle.HIGHEST_PROTOCOL)),ref)
+
+if __name__ == '__main__':
+    unittest.main()
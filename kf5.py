@@ -20,12 +20,22 @@
 
 import argparse
 import configparser
+import contextlib
 import inspect
+import io
+import json
+import os
+# The @sealed attribute checks are only needed while developing. Leave them
+# out of generation runs unless TWINE2_SEALED is set. This has to happen
+# before the classes are defined.
+os.environ.setdefault("TWINE2_SEALED", "0")
 import kbindinggenerator.toolkit as toolkit
 import kbindinggenerator.qtkde5macros as qtkde5macros
 import kbindinggenerator.sipsymboldata as sipsymboldata
-import os
+import multiprocessing
 import re
+import sys
+import time
 
 kauth = None
 kitemmodels = None
@@ -81,7 +91,7 @@ def _printConfiguration(outputBaseDirectory, cmakelistBaseDirectory,
     print('sipImportDirs = {0}'.format(sipImportDirs))
 
 def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory,
-              sipImportDir, sipImportDirs):
+              sipImportDir, sipImportDirs, profile=False, incremental=False, generatorJobs=1):
 
     global kauth
     global kitemmodels
@@ -119,7 +129,10 @@ def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory
         exportMacros=["KAUTH_EXPORT"],
         ignoreBases=[],
         
-        annotationRules=qtkde5macros.annotationRules()
+        annotationRules=qtkde5macros.annotationRules(),
+        profile=profile,
+        incremental=incremental,
+        jobs=generatorJobs
         )
 
     ###########################################################################
@@ -148,7 +161,10 @@ def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory
         exportMacros=["KITEMMODELS_EXPORT"],
         ignoreBases=[],
 
-        annotationRules=qtkde5macros.annotationRules()
+        annotationRules=qtkde5macros.annotationRules(),
+        profile=profile,
+        incremental=incremental,
+        jobs=generatorJobs
         )
 
     ###########################################################################
@@ -179,7 +195,10 @@ def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory
         exportMacros=["KITEMVIEWS_EXPORT"],
         ignoreBases=[],
 
-        annotationRules=qtkde5macros.annotationRules()
+        annotationRules=qtkde5macros.annotationRules(),
+        profile=profile,
+        incremental=incremental,
+        jobs=generatorJobs
         )
 
     ###########################################################################
@@ -210,7 +229,10 @@ def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory
         exportMacros=["KARCHIVE_EXPORT"],
         ignoreBases=[],
 
-        annotationRules=qtkde5macros.annotationRules()
+        annotationRules=qtkde5macros.annotationRules(),
+        profile=profile,
+        incremental=incremental,
+        jobs=generatorJobs
         )
 
     ###########################################################################
@@ -241,7 +263,10 @@ def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory
         exportMacros=["KPLOTTING_EXPORT"],
         ignoreBases=[],
 
-        annotationRules=qtkde5macros.annotationRules()
+        annotationRules=qtkde5macros.annotationRules(),
+        profile=profile,
+        incremental=incremental,
+        jobs=generatorJobs
         )
 
     ###########################################################################
@@ -272,7 +297,10 @@ def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory
         exportMacros=["SOLID_EXPORT"],
         ignoreBases=[],
 
-        annotationRules=qtkde5macros.annotationRules()
+        annotationRules=qtkde5macros.annotationRules(),
+        profile=profile,
+        incremental=incremental,
+        jobs=generatorJobs
         )
 
     ###########################################################################
@@ -304,7 +332,10 @@ def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory
         exportMacros=["KCOREADDONS_EXPORT"],
         ignoreBases=[],
 
-        annotationRules=qtkde5macros.annotationRules()
+        annotationRules=qtkde5macros.annotationRules(),
+        profile=profile,
+        incremental=incremental,
+        jobs=generatorJobs
         )
 
     ###########################################################################
@@ -335,7 +366,10 @@ def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory
         exportMacros=["SONNET_EXPORT","SONNETUI_EXPORT","SONNETCORE_EXPORT"],
         ignoreBases=[],
 
-        annotationRules=qtkde5macros.annotationRules()
+        annotationRules=qtkde5macros.annotationRules(),
+        profile=profile,
+        incremental=incremental,
+        jobs=generatorJobs
         )
 
     ###########################################################################
@@ -367,7 +401,10 @@ def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory
         exportMacros=["KGUIADDONS_EXPORT"],
         ignoreBases=[],
 
-        annotationRules=qtkde5macros.annotationRules()
+        annotationRules=qtkde5macros.annotationRules(),
+        profile=profile,
+        incremental=incremental,
+        jobs=generatorJobs
         )
 
     ###########################################################################
@@ -399,78 +436,148 @@ def _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory
         exportMacros=["KWIDGETSADDONS_EXPORT"],
         ignoreBases=[],
 
-        annotationRules=qtkde5macros.annotationRules()
+        annotationRules=qtkde5macros.annotationRules(),
+        profile=profile,
+        incremental=incremental,
+        jobs=generatorJobs
         )
 
-def updateSIP():
-    global kauth
-    global kitemmodels
-    global kitemviews
-    global karchive
-    global kplotting
-    global solid
-    global kcoreaddons
-    global sonnet
-    global kguiaddons
-    global kwidgetsaddons
-    kauth.run()
-    kitemmodels.run()
-    kitemviews.run()
-    karchive.run()
-    kplotting.run()
-    solid.run()
-    kcoreaddons.run()
-    sonnet.run()
-
-    # kcodecs N/A - use Python's libraries for this functionality.
-    # kwindowsystem N/A
-
-    kguiaddons.run()
-    kwidgetsaddons.run()
-
-    # TODO
-    # kconfig
-    # kjs
-
-def updateDocs():
-    global kauth
-    global kitemmodels
-    global kitemviews
-    global karchive
-    global kplotting
-    global solid
-    global kcoreaddons
-    global sonnet
-    global kguiaddons
-    global kwidgetsaddons
+# Module names in the order they are generated.
+_sipModuleNames = ["kauth", "kitemmodels", "kitemviews", "karchive", "kplotting", "solid",
+                   "kcoreaddons", "sonnet",
+                   # kcodecs N/A - use Python's libraries for this functionality.
+                   # kwindowsystem N/A
+                   "kguiaddons", "kwidgetsaddons"]
+                   # TODO
+                   # kconfig
+                   # kjs
+
+# kauth has no docs.
+_docsModuleNames = [name for name in _sipModuleNames if name!="kauth"]
+
+class _ModuleLog(io.StringIO):
+    """Collects a module's output, optionally echoing it as it is written."""
+    def __init__(self,echo=None):
+        io.StringIO.__init__(self)
+        self._echo = echo
+
+    def write(self,text):
+        if self._echo is not None:
+            self._echo.write(text)
+        return io.StringIO.write(self,text)
+
+def _runModule(moduleName, task, echo=None):
+    # Runs in a pool worker when --jobs is more than 1. The ModuleGenerator
+    # objects are module globals set up by _setupAll() in each worker.
+    generator = globals()[moduleName]
+    log = _ModuleLog(echo)
+    startTime = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        result = None
+        if task in ("sip","all"):
+            generator.run()
+        if task=="docs" or (task=="all" and moduleName in _docsModuleNames):
+            # docs() reuses what run() parsed when both run in this process.
+            result = _extractClassNamespaceNames(moduleName, generator.docs())
+    return (moduleName, log.getvalue(), time.perf_counter()-startTime, result, generator.report())
+
+def _runModuleTask(args):
+    return _runModule(*args)
+
+def _runModules(task, moduleNames, jobs, setupArgs, reportDirectory=None):
+    startTime = time.perf_counter()
+    results = []
+    if jobs<=1 or len(moduleNames)<=1:
+        for moduleName in moduleNames:
+            results.append(_runModule(moduleName, task, sys.stdout))
+    else:
+        pool = multiprocessing.Pool(min(jobs,len(moduleNames)), _setupAll, setupArgs)
+        try:
+            # Results come back in moduleNames order, print each log in one piece.
+            for result in pool.imap(_runModuleTask, [(moduleName, task) for moduleName in moduleNames]):
+                print(result[1], end='')
+                sys.stdout.flush()
+                results.append(result)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    elapsed = time.perf_counter()-startTime
+    _printSummary(task, results, elapsed)
+    if reportDirectory is not None:
+        _writeReports(reportDirectory, task, results, elapsed)
+    return results
+
+def _printSummary(task, results, elapsed):
+    print("\nSummary (%s):" % (task,))
+    totalWarnings = 0
+    for moduleName, log, seconds, names, report in results:
+        warnings = [line for line in log.splitlines() if line.startswith(("Warning","Error"))]
+        totalWarnings += len(warnings)
+        print("    %-16s %8.1fs %4i warnings/errors" % (moduleName, seconds, len(warnings)))
+    print("    %-16s %8.1fs %4i warnings/errors (module time %.1fs)" %
+        ("total", elapsed, totalWarnings, sum(result[2] for result in results)))
+
+def _writeReports(reportDirectory, task, results, elapsed):
+    # One JSON report per module plus a summary of all of them.
+    if not os.path.isdir(reportDirectory):
+        os.makedirs(reportDirectory)
+    phases = {}
+    counters = {}
+    modules = {}
+    for moduleName, log, seconds, names, report in results:
+        with open(os.path.join(reportDirectory, "%s-%s.json" % (moduleName, task)), 'w') as fhandle:
+            json.dump(report, fhandle, indent=1, sort_keys=True)
+        modules[moduleName] = {"wall": seconds, "peakRSS": report["peakRSS"]}
+        for phase in report["phases"]:
+            total = phases.setdefault(phase["name"], {"wall": 0.0, "cpu": 0.0})
+            total["wall"] += phase["wall"]
+            total["cpu"] += phase["cpu"]
+        for name, value in report["counters"].items():
+            counters[name] = counters.get(name, 0) + value
+    summary = {"task": task, "wall": elapsed, "modules": modules, "phases": phases, "counters": counters,
+               "peakRSS": max([module["peakRSS"] or 0 for module in modules.values()] or [0])}
+    with open(os.path.join(reportDirectory, "summary-%s.json" % (task,)), 'w') as fhandle:
+        json.dump(summary, fhandle, indent=1, sort_keys=True)
+    print("Reports written to %s" % (reportDirectory,))
+
+def _extractClassNamespaceNames(moduleName,sipScopes):
+    classNames = []
+    nsNames = [ (moduleName,'global', 'global') ]
+    def ExtractClassNamespace(scope):
+        for item in scope:
+            if isinstance(item,sipsymboldata.SymbolData.SipClass):
+                classNames.append( (moduleName, item.fqPythonName(), item.fqPythonName()) )
+                ExtractClassNamespace(item)
+            elif isinstance(item,sipsymboldata.SymbolData.Namespace):
+                nsTuple = (moduleName,item.fqPythonName(),item.fqPythonName())
+                if nsTuple not in nsNames:
+                    nsNames.append( nsTuple )
+                ExtractClassNamespace(item)
+    for scope in sipScopes:
+        ExtractClassNamespace(scope)
+    return (nsNames, classNames)
+
+def updateSIP(jobs=1, setupArgs=None, reportDirectory=None):
+    _runModules("sip", _sipModuleNames, jobs, setupArgs, reportDirectory)
+
+def updateDocs(outputBaseDirectory, jobs=1, setupArgs=None, reportDirectory=None):
+    _writeAllClasses(outputBaseDirectory, _runModules("docs", _docsModuleNames, jobs, setupArgs, reportDirectory))
+
+def updateAll(outputBaseDirectory, jobs=1, setupArgs=None, reportDirectory=None):
+    # Each module's docs are written straight after its sip files by the same
+    # generator, so the parsed headers and sip files are only read once.
+    _writeAllClasses(outputBaseDirectory, _runModules("all", _sipModuleNames, jobs, setupArgs, reportDirectory))
+
+def _writeAllClasses(outputBaseDirectory, results):
     classNames = []
     nsNames = []
-
-    def UpdateClassNamespaceList(moduleName,sipScopes):
-        nsNames.append( (moduleName,'global', 'global') )
-        def ExtractClassNamespace(scope):
-            for item in scope:
-                if isinstance(item,sipsymboldata.SymbolData.SipClass):
-                    classNames.append( (moduleName, item.fqPythonName(), item.fqPythonName()) )
-                    ExtractClassNamespace(item)
-                elif isinstance(item,sipsymboldata.SymbolData.Namespace):
-                    nsTuple = (moduleName,item.fqPythonName(),item.fqPythonName())
-                    if nsTuple not in nsNames:
-                        nsNames.append( nsTuple )
-                    ExtractClassNamespace(item)
-        for scope in sipScopes:
-            ExtractClassNamespace(scope)
-
-    # UpdateClassNamespaceList('kauth',kauth.docs())
-    UpdateClassNamespaceList('kitemmodels',kitemmodels.docs())
-    UpdateClassNamespaceList('kitemviews',kitemviews.docs())
-    UpdateClassNamespaceList('karchive',karchive.docs())
-    UpdateClassNamespaceList('kplotting',kplotting.docs())
-    UpdateClassNamespaceList('solid',solid.docs())
-    UpdateClassNamespaceList('kcoreaddons',kcoreaddons.docs())
-    UpdateClassNamespaceList('sonnet',sonnet.docs())
-    UpdateClassNamespaceList('kguiaddons',kguiaddons.docs())
-    UpdateClassNamespaceList('kwidgetsaddons',kwidgetsaddons.docs())
+    for moduleName, log, seconds, names, report in results:
+        if names is not None:
+            nsNames.extend(names[0])
+            classNames.extend(names[1])
 
     print("Writing all classes index:")
     toolkit.ModuleGenerator.WriteAllClasses(os.path.join(outputBaseDirectory,"docs/html"),nsNames,classNames)
@@ -496,6 +603,11 @@ def main():
                                      formatter_class=argparse.RawDescriptionHelpFormatter)
     parser.add_argument('-l', '--listopts', default=False, action='store_true', help='list stored configuration option values and exit')
     parser.add_argument('-f', '--configfile', default=configfile, action='store', help='path to alternate configuration file to use')
+    parser.add_argument('-j', '--jobs', default=1, type=int, action='store', help='number of modules to generate in parallel')
+    parser.add_argument('--generator-jobs', default=1, type=int, action='store', help='number of processes each module uses to parse headers and write class pages, ignored when --jobs is more than 1')
+    parser.add_argument('-r', '--report', default=None, action='store', help='write JSON timing reports for each module to this directory and count lexer tokens')
+    parser.add_argument('-i', '--incremental', default=False, action='store_true', help='only convert headers which changed since the previous run')
+    parser.add_argument('--cprofile', default=None, action='store', help='write cProfile stats for each phase of each module to this directory')
     parser.add_argument('-w', '--writeopt', default=[], action='append', help='change config file value using item=value syntax - add multiple times to change multiple values')
     args = parser.parse_args()
     #
@@ -530,11 +642,15 @@ def main():
             _writeConfiguration(settings, configfile)
         exit(0)
         
-    _setupAll(outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory,
-              sipImportDir, sipImportDirs)
+    if args.cprofile:
+        # Read by kbindinggenerator.profiling, also in the worker processes.
+        os.environ["TWINE2_CPROFILE_DIR"] = os.path.abspath(args.cprofile)
+    setupArgs = (outputBaseDirectory, cmakelistBaseDirectory, kdelibsBuildDirectory,
+                 sipImportDir, sipImportDirs, args.report is not None, args.incremental,
+                 args.generator_jobs)
+    _setupAll(*setupArgs)
     #print(repr(kitemmodels.extractCmakeListsHeaders()))
-    updateSIP()
-    updateDocs()
+    updateAll(outputBaseDirectory, args.jobs, setupArgs, args.report)
 
 if __name__=="__main__":
     main()